@@ -0,0 +1,92 @@
+"""
+Benchmark de LaneEnv: pasos/s del núcleo actual frente a la implementación
+original basada en lista de Obstacle (ReferenceLaneEnv), con las mismas semillas.
+
+    python -m benchmarks.bench_env
+"""
+import argparse
+import random
+import time
+from typing import List
+
+from src.env import LaneEnv, Obstacle
+
+class ReferenceLaneEnv(LaneEnv):
+    """LaneEnv antes de las colas por carril: lista de obstáculos que se recorre en cada paso."""
+
+    def __init__(self, horizon: int = 12, spawn_prob: float = 0.35, seed: int = 7):
+        super().__init__(horizon=horizon, spawn_prob=spawn_prob, seed=seed)
+        self.ref_obstacles: List[Obstacle] = []
+
+    def reset(self):
+        self.car_lane = 1
+        self.ref_obstacles: List[Obstacle] = []
+        self.step_count = 0
+        self.done = False
+        return self.state()
+
+    @property
+    def obstacles(self):
+        return self.ref_obstacles
+
+    def state(self):
+        dists = [self.horizon, self.horizon, self.horizon]
+        for ob in self.ref_obstacles:
+            if 0 <= ob.y <= dists[ob.lane]:
+                dists[ob.lane] = ob.y
+        return (self.car_lane, self._bin_dist(dists[0]), self._bin_dist(dists[1]), self._bin_dist(dists[2]))
+
+    def step(self, action: int):
+        if action == 0:
+            self.car_lane = max(0, self.car_lane - 1)
+        elif action == 2:
+            self.car_lane = min(2, self.car_lane + 1)
+
+        crashed = False
+        new_obs = []
+        for ob in self.ref_obstacles:
+            ob.y -= 1
+            if ob.y < 0:
+                continue
+            if ob.y == 0 and ob.lane == self.car_lane:
+                crashed = True
+            new_obs.append(ob)
+        self.ref_obstacles = new_obs
+
+        too_close = any(ob.y > (self.horizon - self.min_gap) for ob in self.ref_obstacles)
+        if not too_close and self.rng.random() < self.spawn_prob:
+            l = self.rng.randint(0, 2)
+            self.ref_obstacles.append(Obstacle(lane=l, y=self.horizon))
+
+        self.step_count += 1
+        reward = 1.0
+        if crashed:
+            reward = -10.0
+            self.done = True
+        return self.state(), reward, self.done, {"crashed": crashed, "distance": self.step_count}
+
+def steps_per_sec(env_cls, n_steps: int, horizon: int = 12, seed: int = 7) -> float:
+    env = env_cls(horizon=horizon, seed=seed)
+    env.reset()
+    actions = random.Random(seed)
+    acts = [actions.randint(0, 2) for _ in range(n_steps)]
+    t0 = time.perf_counter()
+    for a in acts:
+        _, _, done, _ = env.step(a)
+        if done:
+            env.reset()
+    return n_steps / (time.perf_counter() - t0)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LaneEnv steps/sec, before and after")
+    parser.add_argument("--steps", type=int, default=500_000)
+    parser.add_argument("--horizon", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    for name, cls in (("before (ReferenceLaneEnv)", ReferenceLaneEnv), ("after  (LaneEnv)", LaneEnv)):
+        best = max(steps_per_sec(cls, args.steps, args.horizon) for _ in range(args.repeat))
+        print(f"{name}: {best:,.0f} steps/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Suite de benchmarks: rendimiento de LaneEnv, QLearningAgent, Trainer y GameUI
+con semillas fijas. Los resultados se guardan en JSON y se pueden comparar con
+una línea base guardada (sale con código 1 si alguna métrica empeora más del umbral).
+
+    python -m benchmarks.suite --save benchmarks/baseline.json
+    python -m benchmarks.suite --compare benchmarks/baseline.json --threshold 0.10
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from src.env import LaneEnv
+from src.agent import QLearningAgent, DenseQLearningAgent
+from src.train import Trainer
+
+SEED = 7
+
+@dataclass(frozen=True)
+class Metric:
+    name: str
+    unit: str
+    higher_is_better: bool
+    run: Callable[[bool], float]  # quick -> value
+
+def _best(fn: Callable[[], float], repeat: int) -> float:
+    return max(fn() for _ in range(repeat))
+
+def _transitions(n: int, seed: int = SEED):
+    """Transiciones (s, a, r, s2, done) de LaneEnv con acciones aleatorias fijas."""
+    env = LaneEnv(seed=seed)
+    rng = random.Random(seed)
+    s = env.reset()
+    out = []
+    for _ in range(n):
+        a = rng.randint(0, 2)
+        s2, r, done, _ = env.step(a)
+        out.append((s, a, r, s2, done))
+        s = env.reset() if done else s2
+    return out
+
+def env_steps_per_sec(quick: bool) -> float:
+    n = 100_000 if quick else 500_000
+    rng = random.Random(SEED)
+    acts = [rng.randint(0, 2) for _ in range(n)]
+
+    def once():
+        env = LaneEnv(seed=SEED)
+        env.reset()
+        t0 = time.perf_counter()
+        for a in acts:
+            _, _, done, _ = env.step(a)
+            if done:
+                env.reset()
+        return n / (time.perf_counter() - t0)
+    return _best(once, 3)
+
+def _agent_updates_per_sec(cls, quick: bool) -> float:
+    data = _transitions(50_000 if quick else 200_000)
+
+    def once():
+        agent = cls(seed=SEED)
+        learn = agent.learn
+        t0 = time.perf_counter()
+        for s, a, r, s2, done in data:
+            learn(s, a, r, s2, done)
+        return len(data) / (time.perf_counter() - t0)
+    return _best(once, 3)
+
+def _agent_acts_per_sec(cls, quick: bool) -> float:
+    states = [t[0] for t in _transitions(50_000 if quick else 200_000)]
+
+    def once():
+        agent = cls(seed=SEED, epsilon=0.1)
+        act = agent.act
+        t0 = time.perf_counter()
+        for s in states:
+            act(s, training=True)
+        return len(states) / (time.perf_counter() - t0)
+    return _best(once, 3)
+
+def _trainer_run(quick: bool):
+    n = 300 if quick else 1000
+    trainer = Trainer(seed=SEED)
+    t0 = time.perf_counter()
+    trainer.train(n_episodes=n)
+    elapsed = time.perf_counter() - t0
+    return n / elapsed, trainer.stats.distance_sum / elapsed
+
+def trainer_episodes_per_sec(quick: bool) -> float:
+    return _best(lambda: _trainer_run(quick)[0], 3)
+
+def trainer_transitions_per_sec(quick: bool) -> float:
+    return _best(lambda: _trainer_run(quick)[1], 3)
+
+def recorded_episodes_peak_kib(quick: bool) -> float:
+    """Pico de memoria (tracemalloc) al entrenar grabando todos los episodios."""
+    n = 200 if quick else 500
+    gc.collect()
+    tracemalloc.start()
+    try:
+        trainer = Trainer(seed=SEED)
+        trainer.train(n_episodes=n, keep_every=1)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+def _ui_frame_ms(n_history: int, new_episode_per_frame: bool, quick: bool) -> float:
+    """Tiempo medio de GameUI.frame() (ms) con n_history episodios en LiveStats."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from src.render import GameUI
+    import pygame
+
+    trainer = Trainer(seed=SEED)
+    ui = GameUI(trainer)
+    rng = random.Random(SEED)
+    eps = 1.0
+    for _ in range(n_history):
+        eps = max(0.01, eps * 0.999)
+        d = rng.randint(1, 400)
+        ui.stats.add_episode(distance=d, total_reward=d - 11.0, crashed=True, epsilon=eps)
+    ui.auto_play = True
+
+    frames = 100 if quick else 300
+    ui.frame()  # first frame draws the whole window
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        if new_episode_per_frame:
+            ui.stats.add_episode(distance=rng.randint(1, 400), total_reward=0.0, crashed=True, epsilon=eps)
+        ui.frame()
+    elapsed = time.perf_counter() - t0
+    pygame.quit()
+    return elapsed / frames * 1000
+
+def _ui_metrics() -> List[Metric]:
+    out = []
+    for label, n in (("1k", 1_000), ("100k", 100_000), ("1m", 1_000_000)):
+        out.append(Metric(f"ui_frame_ms_{label}", "ms", False,
+                          lambda quick, n=n: _ui_frame_ms(n, False, quick)))
+        out.append(Metric(f"ui_frame_new_episode_ms_{label}", "ms", False,
+                          lambda quick, n=n: _ui_frame_ms(n, True, quick)))
+    return out
+
+METRICS: List[Metric] = [
+    Metric("env_steps_per_sec", "steps/s", True, env_steps_per_sec),
+    Metric("agent_updates_per_sec_dict", "updates/s", True, lambda q: _agent_updates_per_sec(QLearningAgent, q)),
+    Metric("agent_updates_per_sec_dense", "updates/s", True, lambda q: _agent_updates_per_sec(DenseQLearningAgent, q)),
+    Metric("agent_acts_per_sec_dict", "acts/s", True, lambda q: _agent_acts_per_sec(QLearningAgent, q)),
+    Metric("agent_acts_per_sec_dense", "acts/s", True, lambda q: _agent_acts_per_sec(DenseQLearningAgent, q)),
+    Metric("trainer_episodes_per_sec", "episodes/s", True, trainer_episodes_per_sec),
+    Metric("trainer_transitions_per_sec", "steps/s", True, trainer_transitions_per_sec),
+    Metric("recorded_episodes_peak_kib", "KiB", False, recorded_episodes_peak_kib),
+] + _ui_metrics()
+
+def run_suite(names: Optional[List[str]] = None, quick: bool = False) -> Dict:
+    metrics = {}
+    for m in METRICS:
+        if names and m.name not in names:
+            continue
+        metrics[m.name] = {"value": m.run(quick), "unit": m.unit, "higher_is_better": m.higher_is_better}
+        print(f"{m.name:34s} {metrics[m.name]['value']:>14,.3f} {m.unit}", flush=True)
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "quick": quick,
+            "seed": SEED,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "metrics": metrics,
+    }
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Compara dos resultados y devuelve las métricas que empeoran más de
+    threshold (fracción relativa, en la dirección "peor" de cada métrica).
+    """
+    regressions = []
+    print(f"\n{'metric':34s} {'baseline':>14s} {'current':>14s} {'change':>8s}")
+    for name, cur in current["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None or not base["value"]:
+            print(f"{name:34s} {'-':>14s} {cur['value']:>14,.3f}")
+            continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        worse = -change if cur["higher_is_better"] else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        print(f"{name:34s} {base['value']:>14,.3f} {cur['value']:>14,.3f} {change * 100:>+7.1f}%{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput benchmarks for env, agent, trainer and renderer")
+    parser.add_argument("--only", nargs="+", metavar="METRIC", choices=[m.name for m in METRICS])
+    parser.add_argument("--quick", action="store_true", help="smaller workloads (not comparable with full runs)")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown that counts as a regression (default 0.10)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.only, quick=args.quick)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("quick") != args.quick:
+            print("warning: baseline and current run use different workload sizes (--quick)")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,40 @@
+import argparse
+import os
+
 from src.train import Trainer
-from src.render import GameUI
 
-def main():
-    trainer = Trainer()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Q-learning lane driving with live visualization")
+    parser.add_argument("--resume", default=None, metavar="PATH",
+                        help="start from this checkpoint if it exists (see src/checkpoint.py)")
+    parser.add_argument("--autosave", default=None, metavar="PATH",
+                        help="checkpoint periodically while training and on exit (defaults to --resume)")
+    parser.add_argument("--autosave-every", type=float, default=60.0, metavar="SECONDS")
+    parser.add_argument("--n-lanes", type=int, default=3)
+    parser.add_argument("--window", type=int, default=None, metavar="K",
+                        help="state only sees lanes within K of the car")
+    args = parser.parse_args(argv)
+
+    if args.resume and os.path.exists(args.resume):
+        from src.checkpoint import load_checkpoint
+        trainer = load_checkpoint(args.resume)
+    else:
+        trainer = Trainer(n_lanes=args.n_lanes, window=args.window)
+
+    save_path = args.autosave or args.resume
+    if save_path:
+        from src.checkpoint import AutoSaver
+        trainer.autosave = AutoSaver(save_path, interval=args.autosave_every)
+
+    # pygame is only imported when the UI is actually requested
+    from src.render import GameUI
+
     ui = GameUI(trainer)
-    ui.run()
+    try:
+        ui.run()
+    finally:
+        if trainer.autosave is not None:
+            trainer.autosave.save(trainer, block=True)
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,14 @@
+import math
 import random
-from typing import Dict, Tuple
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Dict, Optional, Sequence, Tuple
 
-# State definition matching Env: (car_lane, dL, dM, dR)
+import numpy as np
+
+from src.env import N_BINS
+
+# State definition matching Env: (car_lane, dL, dM, dR); other lane layouts use longer tuples
 State = tuple[int, int, int, int]
 
 class QLearningAgent:
@@ -42,8 +49,11 @@ class QLearningAgent:
         candidates = [i for i, v in enumerate(q_vals) if v == max_v]
         return self.rng.choice(candidates)
 
-    def learn(self, s: State, a: int, r: float, s2: State, done: bool):
-        """Actualiza la tabla Q usando la ecuación de Bellman."""
+    def learn(self, s: State, a: int, r: float, s2: State, done: bool, weight: float = 1.0):
+        """
+        Actualiza la tabla Q usando la ecuación de Bellman.
+        weight escala el paso (pesos de importancia del replay); devuelve el error TD.
+        """
         q_old = self.get_q(s)[a]
         
         if done:
@@ -52,8 +62,275 @@ class QLearningAgent:
             target = r + self.gamma * max(self.get_q(s2))
             
         # Update
-        self.q_table[s][a] += self.alpha * (target - q_old)
+        td = target - q_old
+        self.q_table[s][a] += self.alpha * weight * td
+        return td
 
     def decay(self):
         """Reduce el valor de epsilon para disminuir la exploración con el tiempo."""
         self.epsilon = max(0.01, self.epsilon * self.epsilon_decay)
+
+    def play_copy(self) -> "QLearningAgent":
+        """
+        Copia independiente para jugar (act) en otro hilo: un QLearningAgent con
+        las filas Q conocidas y su propio RNG. Copia solo filas, así que cuesta
+        O(estados visitados) aunque el agente sea dense o hashed.
+        """
+        return self._play_copy(((s, row[:]) for s, row in self.q_table.items()))
+
+    def _play_copy(self, rows) -> "QLearningAgent":
+        clone = QLearningAgent(alpha=self.alpha, gamma=self.gamma, epsilon=self.epsilon,
+                               epsilon_decay=self.epsilon_decay)
+        clone.rng.setstate(self.rng.getstate())
+        clone.q_table = dict(rows)
+        return clone
+
+
+class HashedQLearningAgent(QLearningAgent):
+    """
+    QLearningAgent con la tabla Q acotada a max_states estados: al superarla
+    se descarta el estado usado hace más tiempo (LRU). Pensado para codificaciones
+    con muchos carriles, donde el número de estados posibles es enorme pero
+    los visitados con frecuencia son pocos.
+    """
+
+    def __init__(self, alpha=0.20, gamma=0.95, epsilon=1.0, epsilon_decay=0.990, seed=7,
+                 max_states: int = 100_000):
+        super().__init__(alpha=alpha, gamma=gamma, epsilon=epsilon, epsilon_decay=epsilon_decay, seed=seed)
+        self.max_states = max_states
+        self.q_table: "OrderedDict[State, list[float]]" = OrderedDict()
+        self.evictions = 0
+
+    def get_q(self, state: State):
+        q_table = self.q_table
+        row = q_table.get(state)
+        if row is None:
+            row = q_table[state] = [0.0, 0.0, 0.0]
+            if len(q_table) > self.max_states:
+                q_table.popitem(last=False)
+                self.evictions += 1
+        else:
+            q_table.move_to_end(state)
+        return row
+
+    def learn(self, s: State, a: int, r: float, s2: State, done: bool, weight: float = 1.0):
+        # get_q(s2) may evict s when the table is full, so keep s's row before looking at s2
+        row = self.get_q(s)
+        if done:
+            target = r
+        else:
+            target = r + self.gamma * max(self.get_q(s2))
+        td = target - row[a]
+        row[a] += self.alpha * weight * td
+        return td
+
+
+# Dense layout of the classic 3-lane state
+N_LANES = 3
+N_STATES = N_LANES * N_BINS ** 3
+N_ACTIONS = 3
+STATE_DIMS = (N_LANES,) + (N_BINS,) * N_LANES
+
+# Largest table DenseQLearningAgent allocates (rows); bigger layouts need a window or the hashed agent
+MAX_DENSE_STATES = 20_000_000
+
+def state_index(state: State) -> int:
+    """Índice entero (0..N_STATES-1) de un estado (car_lane, dL, dM, dR)."""
+    lane, d0, d1, d2 = state
+    return ((lane * N_BINS + d0) * N_BINS + d1) * N_BINS + d2
+
+def index_state(idx: int) -> State:
+    """Inverso de state_index."""
+    idx, d2 = divmod(int(idx), N_BINS)
+    idx, d1 = divmod(idx, N_BINS)
+    lane, d0 = divmod(idx, N_BINS)
+    return (lane, d0, d1, d2)
+
+def state_indices(states) -> np.ndarray:
+    """Versión vectorizada de state_index para un array (n, 4) de estados."""
+    s = np.asarray(states, dtype=np.intp)
+    return ((s[:, 0] * N_BINS + s[:, 1]) * N_BINS + s[:, 2]) * N_BINS + s[:, 3]
+
+
+class QTableView(MutableMapping):
+    """
+    Vista tipo dict (state -> fila Q) sobre la tabla densa de DenseQLearningAgent.
+    Solo contiene los estados visitados, igual que el q_table del agente con dict.
+    Las filas son vistas del array, así que q_table[s][a] += x escribe en él.
+    """
+
+    def __init__(self, q: np.ndarray, visited: np.ndarray, index=state_index, unindex=index_state):
+        self._q = q
+        self._visited = visited
+        self._index = index
+        self._unindex = unindex
+
+    def __getitem__(self, state: State):
+        idx = self._index(state)
+        if not self._visited[idx]:
+            raise KeyError(state)
+        return self._q[idx]
+
+    def __setitem__(self, state: State, values):
+        idx = self._index(state)
+        self._q[idx] = values
+        self._visited[idx] = True
+
+    def __delitem__(self, state: State):
+        idx = self._index(state)
+        if not self._visited[idx]:
+            raise KeyError(state)
+        self._q[idx] = 0.0
+        self._visited[idx] = False
+
+    def __contains__(self, state) -> bool:
+        return bool(self._visited[self._index(state)])
+
+    def __iter__(self):
+        return (self._unindex(i) for i in np.flatnonzero(self._visited))
+
+    def __len__(self) -> int:
+        return int(self._visited.sum())
+
+
+class DenseQLearningAgent(QLearningAgent):
+    """
+    Q-Learning con la tabla Q en un array denso (n_states x N_ACTIONS).
+    act/learn se comportan igual que QLearningAgent (mismo seed -> mismas acciones);
+    act_batch/learn_batch aplican epsilon-greedy y Bellman sobre lotes de estados.
+    state_dims es el número de valores de cada componente del estado
+    (LaneEnv.state_dims); por defecto el estado clásico de 3 carriles.
+    """
+
+    def __init__(self, alpha=0.20, gamma=0.95, epsilon=1.0, epsilon_decay=0.990, seed=7,
+                 state_dims: Optional[Sequence[int]] = None):
+        super().__init__(alpha=alpha, gamma=gamma, epsilon=epsilon, epsilon_decay=epsilon_decay, seed=seed)
+        self.state_dims = tuple(state_dims) if state_dims is not None else STATE_DIMS
+        self.n_states = math.prod(self.state_dims)
+        if self.n_states > MAX_DENSE_STATES:
+            raise ValueError(f"dense Q-table would need {self.n_states} states; "
+                             "use a lane window or the hashed agent")
+        if self.state_dims != STATE_DIMS:
+            # Generic mixed-radix index; the classic layout keeps the unrolled state_index
+            self.index = self._index
+            self.indices = self._indices
+            self.unindex = self._unindex
+        self.np_rng = np.random.default_rng(seed)
+        self.q = np.zeros((self.n_states, N_ACTIONS), dtype=np.float64)
+        self.visited = np.zeros(self.n_states, dtype=bool)
+        self.q_table = QTableView(self.q, self.visited, self.index, self.unindex)
+
+    # Classic layout: module-level functions (overridden per instance for other layouts)
+    index = staticmethod(state_index)
+    indices = staticmethod(state_indices)
+    unindex = staticmethod(index_state)
+
+    def _index(self, state: State) -> int:
+        idx = 0
+        for v, d in zip(state, self.state_dims):
+            idx = idx * d + v
+        return idx
+
+    def _indices(self, states) -> np.ndarray:
+        s = np.asarray(states, dtype=np.intp)
+        return np.ravel_multi_index(tuple(s.T), self.state_dims)
+
+    def play_copy(self) -> QLearningAgent:
+        # Only the visited rows, unindexed in bulk (the full table can be millions of rows)
+        idx = np.flatnonzero(self.visited)
+        states = zip(*(c.tolist() for c in np.unravel_index(idx, self.state_dims)))
+        return self._play_copy(zip(states, self.q[idx].tolist()))
+
+    def _unindex(self, idx: int) -> State:
+        return tuple(int(v) for v in np.unravel_index(int(idx), self.state_dims))
+
+    def get_q(self, state: State):
+        idx = self.index(state)
+        self.visited[idx] = True
+        return self.q[idx]
+
+    def act(self, state: State, training: bool = True):
+        if training and self.rng.random() < self.epsilon:
+            return self.rng.randint(0, 2)
+
+        q_vals = self.get_q(state).tolist()
+        max_v = max(q_vals)
+        candidates = [i for i, v in enumerate(q_vals) if v == max_v]
+        return self.rng.choice(candidates)
+
+    def learn(self, s: State, a: int, r: float, s2: State, done: bool, weight: float = 1.0):
+        i = self.index(s)
+        self.visited[i] = True
+        if done:
+            target = r
+        else:
+            j = self.index(s2)
+            self.visited[j] = True
+            target = r + self.gamma * self.q[j].max()
+        td = target - self.q[i, a]
+        self.q[i, a] += self.alpha * weight * td
+        return td
+
+    def act_batch(self, states, training: bool = True) -> np.ndarray:
+        """Acciones epsilon-greedy para un lote (n, len(state_dims)) de estados; empates al azar."""
+        idx = self.indices(states)
+        self.visited[idx] = True
+        q_vals = self.q[idx]
+        n = idx.shape[0]
+
+        # Random tie-breaking: among the max entries pick the one with the largest noise
+        is_max = q_vals == q_vals.max(axis=1, keepdims=True)
+        noise = self.np_rng.random((n, N_ACTIONS))
+        actions = np.where(is_max, noise, -1.0).argmax(axis=1)
+
+        if training:
+            explore = self.np_rng.random(n) < self.epsilon
+            actions[explore] = self.np_rng.integers(0, N_ACTIONS, size=int(explore.sum()))
+        return actions
+
+    def learn_batch(self, s, a, r, s2, done):
+        """
+        Actualización de Bellman para un lote de transiciones.
+        Si un mismo (estado, acción) aparece varias veces en el lote se aplica
+        la media de sus errores TD, para no multiplicar el paso alpha.
+        """
+        self.learn_batch_indices(self.indices(s), a, r, self.indices(s2), done)
+
+    def learn_batch_indices(self, i, a, r, j, done):
+        """learn_batch con los estados ya convertidos con index()."""
+        i = np.asarray(i, dtype=np.intp)
+        j = np.asarray(j, dtype=np.intp)
+        a = np.asarray(a, dtype=np.intp)
+        r = np.asarray(r, dtype=np.float64)
+        done = np.asarray(done, dtype=bool)
+        self.visited[i] = True
+        self.visited[j[~done]] = True
+
+        target = r + np.where(done, 0.0, self.gamma * self.q[j].max(axis=1))
+        flat = i * N_ACTIONS + a
+        td = target - self.q.ravel()[flat]
+
+        size = self.q.size
+        td_sum = np.bincount(flat, weights=td, minlength=size)
+        counts = np.bincount(flat, minlength=size)
+        hit = counts > 0
+        self.q.ravel()[hit] += self.alpha * td_sum[hit] / counts[hit]
+
+    def learn_indices(self, i, a, r, j, done):
+        """
+        Aplica learn() transición a transición, en orden, sobre estados ya
+        indexados (mismo resultado que llamar learn con cada tupla).
+        """
+        q = self.q
+        visited = self.visited
+        alpha, gamma = self.alpha, self.gamma
+        for si, ai, ri, sj, d in zip(np.asarray(i).tolist(), np.asarray(a).tolist(),
+                                     np.asarray(r).tolist(), np.asarray(j).tolist(),
+                                     np.asarray(done).tolist()):
+            visited[si] = True
+            if d:
+                target = ri
+            else:
+                visited[sj] = True
+                target = ri + gamma * max(q[sj].tolist())
+            q[si, ai] += alpha * (target - q[si, ai])
@@ -0,0 +1,248 @@
+import json
+import os
+import random
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from src.stats import LiveStats
+from src.train import AGENT_BACKENDS, Trainer
+
+CHECKPOINT_MAGIC = b"LANECKPT"
+FORMAT_VERSION = 1
+
+# magic, format version, JSON header length
+_PREFIX = struct.Struct("<8sII")
+
+@dataclass
+class Checkpoint:
+    """
+    Estado capturado de un Trainer: cabecera (config, epsilon, estados de RNG
+    pequeños) y arrays (tabla Q dispersa, estados de Mersenne Twister, series de LiveStats).
+    """
+    header: Dict[str, Any]
+    arrays: Dict[str, Any] = field(default_factory=dict)
+
+def _backend_name(agent) -> str:
+    for name, cls in AGENT_BACKENDS.items():
+        if type(agent) is cls:
+            return name
+    raise TypeError(f"no checkpoint support for agent type {type(agent).__name__}")
+
+def _rng_state(rng: random.Random):
+    version, words, gauss = rng.getstate()
+    return np.array(words, dtype=np.uint32), [version, gauss]
+
+def _set_rng_state(rng: random.Random, words: np.ndarray, meta):
+    version, gauss = meta
+    rng.setstate((version, tuple(words.tolist()), gauss))
+
+def capture(trainer: Trainer) -> Checkpoint:
+    """
+    Copia el estado del trainer. Solo hace copias baratas (listas de
+    LiveStats, ~cientos de filas Q); la conversión a arrays la hace write_checkpoint,
+    que puede ejecutarse en otro hilo.
+    """
+    agent, env, st = trainer.agent, trainer.env, trainer.stats
+    agent_words, agent_meta = _rng_state(agent.rng)
+    env_words, env_meta = _rng_state(env.rng)
+
+    if hasattr(agent, "visited"):
+        idx = np.flatnonzero(agent.visited)
+        states = np.stack(np.unravel_index(idx, agent.state_dims), axis=1)
+        values = agent.q[idx]  # fancy indexing already copies
+    else:
+        states = list(agent.q_table.keys())
+        values = [list(agent.q_table[s]) for s in states]
+
+    header = {
+        "config": {
+            "horizon": env.horizon,
+            "spawn_prob": env.spawn_prob,
+            "seed": trainer.seed,
+            "alpha": agent.alpha,
+            "gamma": agent.gamma,
+            "epsilon_decay": agent.epsilon_decay,
+            "agent_backend": _backend_name(agent),
+            "n_lanes": env.n_lanes,
+            "window": env.window,
+        },
+        "state_dims": list(env.state_dims),
+        "epsilon": agent.epsilon,
+        "rng": {"agent": agent_meta, "env": env_meta},
+        "stats": {"window": st.window, "ma_window": st.ma_window},
+    }
+    if hasattr(agent, "max_states"):
+        header["config"]["max_states"] = agent.max_states
+    if hasattr(agent, "np_rng"):
+        header["rng"]["agent_np"] = agent.np_rng.bit_generator.state
+
+    n = len(st.distances)
+    arrays = {
+        "agent_rng": agent_words,
+        "env_rng": env_words,
+        "q_states": (states, np.int8),
+        "q_values": (values, np.float64),
+        # Lists only grow, so slicing to n is a consistent snapshot
+        "distances": (st.distances[:n], np.int64),
+        "rewards": (st.rewards[:n], np.float64),
+        "crashes": (st.crashes[:n], np.uint8),
+        "epsilons": (st.epsilons[:n], np.float64),
+    }
+    return Checkpoint(header=header, arrays=arrays)
+
+def _align(x: int) -> int:
+    return (x + 7) & ~7
+
+def write_checkpoint(ckpt: Checkpoint, path: str):
+    """
+    Escribe el checkpoint en path de forma atómica (archivo temporal + rename).
+
+    Formato: _PREFIX | cabecera JSON | arrays alineados a 8 bytes. La cabecera
+    guarda offset, dtype y shape de cada array, así que load_checkpoint los
+    lee con np.memmap sin parsear nada más.
+    """
+    arrays = {}
+    for name, value in ckpt.arrays.items():
+        if isinstance(value, tuple):
+            data, dtype = value
+            value = np.asarray(data, dtype=dtype)
+        arrays[name] = np.ascontiguousarray(value)
+    if arrays["q_states"].size == 0:
+        arrays["q_states"] = arrays["q_states"].reshape(0, len(ckpt.header["state_dims"]))
+        arrays["q_values"] = arrays["q_values"].reshape(0, 3)
+
+    # Offsets are relative to the aligned end of the header, so they do not depend on its length
+    index, offset = {}, 0
+    for name, arr in arrays.items():
+        index[name] = {"offset": offset, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+        offset = _align(offset + arr.nbytes)
+    header = dict(ckpt.header, arrays=index)
+    blob = json.dumps(header).encode("utf-8")
+    data_start = _align(_PREFIX.size + len(blob))
+
+    tmp = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(CHECKPOINT_MAGIC, FORMAT_VERSION, len(blob)))
+        f.write(blob)
+        f.write(b"\0" * (data_start - _PREFIX.size - len(blob)))
+        for name, arr in arrays.items():
+            f.write(arr.tobytes())
+            f.write(b"\0" * (_align(arr.nbytes) - arr.nbytes))
+    os.replace(tmp, path)
+
+def save_checkpoint(trainer: Trainer, path: str):
+    write_checkpoint(capture(trainer), path)
+
+def read_checkpoint(path: str) -> Checkpoint:
+    """Lee la cabecera y devuelve los arrays como vistas de solo lectura sobre un memmap."""
+    with open(path, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ValueError(f"{path} is not a checkpoint")
+        magic, version, header_len = _PREFIX.unpack(prefix)
+        if magic != CHECKPOINT_MAGIC:
+            raise ValueError(f"{path} is not a checkpoint")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported checkpoint version {version} (expected {FORMAT_VERSION})")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+
+    data_start = _align(_PREFIX.size + header_len)
+    buf = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in header.pop("arrays").items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        start = data_start + spec["offset"]
+        size = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        arrays[name] = buf[start:start + size].view(dtype).reshape(shape)
+    return Checkpoint(header=header, arrays=arrays)
+
+def restore(trainer: Trainer, ckpt: Checkpoint):
+    """Carga en trainer la tabla Q, epsilon, estados de RNG y LiveStats del checkpoint."""
+    h, arr = ckpt.header, ckpt.arrays
+    agent = trainer.agent
+    if _backend_name(agent) != h["config"]["agent_backend"]:
+        raise ValueError(f"checkpoint is for agent backend {h['config']['agent_backend']!r}")
+    if tuple(h.get("state_dims", trainer.env.state_dims)) != trainer.env.state_dims:
+        raise ValueError(f"checkpoint state layout {h['state_dims']} does not match the env's {trainer.env.state_dims}")
+
+    agent.epsilon = h["epsilon"]
+    _set_rng_state(agent.rng, arr["agent_rng"], h["rng"]["agent"])
+    _set_rng_state(trainer.env.rng, arr["env_rng"], h["rng"]["env"])
+    if "agent_np" in h["rng"] and hasattr(agent, "np_rng"):
+        agent.np_rng.bit_generator.state = h["rng"]["agent_np"]
+
+    states, values = arr["q_states"], arr["q_values"]
+    if hasattr(agent, "visited"):
+        idx = agent.indices(states)
+        agent.q[:] = 0.0
+        agent.visited[:] = False
+        agent.q[idx] = values
+        agent.visited[idx] = True
+    else:
+        agent.q_table.clear()
+        for s, row in zip(map(tuple, states.tolist()), values.tolist()):
+            agent.q_table[s] = row
+
+    sh = h["stats"]
+    trainer.stats = LiveStats.from_arrays(arr["distances"], arr["rewards"], arr["crashes"], arr["epsilons"],
+                                          window=sh["window"], ma_window=sh["ma_window"])
+
+def load_checkpoint(path: str, archive_path: Optional[str] = None) -> Trainer:
+    """Crea un Trainer con la configuración guardada y le restaura el estado."""
+    ckpt = read_checkpoint(path)
+    trainer = Trainer(archive_path=archive_path, **ckpt.header["config"])
+    restore(trainer, ckpt)
+    return trainer
+
+
+class AutoSaver:
+    """
+    Guardado periódico para Trainer.train (trainer.autosave = AutoSaver(...)).
+
+    maybe_save() solo consulta el reloj hasta que pasa `interval` segundos;
+    entonces captura el estado y lo escribe en un hilo aparte. Si la escritura
+    anterior sigue en curso, se salta el guardado en lugar de esperar.
+    """
+
+    def __init__(self, path: str, interval: float = 60.0):
+        self.path = path
+        self.interval = interval
+        self.saves = 0
+        self._last = time.perf_counter()
+        self._thread: Optional[threading.Thread] = None
+        self.error: Optional[BaseException] = None
+
+    def maybe_save(self, trainer: Trainer):
+        if time.perf_counter() - self._last >= self.interval:
+            self.save(trainer)
+
+    def save(self, trainer: Trainer, block: bool = False):
+        if self._thread is not None and self._thread.is_alive():
+            if not block:
+                return
+            self._thread.join()
+        self._last = time.perf_counter()
+        ckpt = capture(trainer)
+        if block:
+            write_checkpoint(ckpt, self.path)
+            self.saves += 1
+            return
+        self._thread = threading.Thread(target=self._write, args=(ckpt,), name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def _write(self, ckpt: Checkpoint):
+        try:
+            write_checkpoint(ckpt, self.path)
+            self.saves += 1
+        except BaseException as e:  # reported through .error, training keeps going
+            self.error = e
+
+    def wait(self):
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,229 @@
+import multiprocessing as mp
+import queue
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from src.env import LaneEnv
+from src.agent import DenseQLearningAgent, N_ACTIONS
+
+# Shared control block: [epsilon, stop flag]
+_EPSILON, _STOP = 0, 1
+
+LEARNER_MODES = ("batch", "sequential")
+
+@dataclass
+class TransitionBatch:
+    """Lote de transiciones de un actor (estados como índice de la tabla Q) y episodios terminados."""
+    actor: int
+    s: np.ndarray         # int32[n]
+    a: np.ndarray         # int8[n]
+    r: np.ndarray         # float32[n]
+    s2: np.ndarray        # int32[n]
+    done: np.ndarray      # bool[n]
+    episodes: List[tuple] # (distance, total_reward, crashed) per finished episode
+
+    def __len__(self) -> int:
+        return len(self.a)
+
+
+class Actor:
+    """
+    Un LaneEnv con su propia semilla jugando epsilon-greedy sobre una vista
+    (solo lectura) de la tabla Q compartida. collect() devuelve el siguiente
+    lote de batch_size transiciones; los episodios continúan entre lotes.
+    """
+
+    def __init__(self, actor_id: int, q: np.ndarray, control: np.ndarray, env_config: dict,
+                 env_seed: int, agent_seed: int, batch_size: int):
+        self.actor_id = actor_id
+        self.control = control
+        self.env = LaneEnv(seed=env_seed, **env_config)
+        # Only act() is used: its Q rows are the shared table, updated by the learner
+        self.agent = DenseQLearningAgent(epsilon=float(control[_EPSILON]), seed=agent_seed,
+                                         state_dims=self.env.state_dims)
+        self.agent.q = q
+        self.batch_size = batch_size
+        self.s = self.env.reset()
+        self.total = 0.0
+
+    def collect(self) -> TransitionBatch:
+        n = self.batch_size
+        s_idx = np.empty(n, dtype=np.int32)
+        acts = np.empty(n, dtype=np.int8)
+        rewards = np.empty(n, dtype=np.float32)
+        s2_idx = np.empty(n, dtype=np.int32)
+        dones = np.zeros(n, dtype=bool)
+        episodes = []
+
+        env, agent, s = self.env, self.agent, self.s
+        index = agent.index
+        agent.epsilon = float(self.control[_EPSILON])
+        for k in range(n):
+            a = agent.act(s, training=True)
+            s2, r, done, info = env.step(a)
+            s_idx[k] = index(s)
+            acts[k] = a
+            rewards[k] = r
+            s2_idx[k] = index(s2)
+            self.total += r
+            if done:
+                dones[k] = True
+                episodes.append((info["distance"], self.total, info["crashed"]))
+                self.total = 0.0
+                s = env.reset()
+                # Epsilon is decayed by the learner, per finished episode
+                agent.epsilon = float(self.control[_EPSILON])
+            else:
+                s = s2
+        self.s = s
+        return TransitionBatch(self.actor_id, s_idx, acts, rewards, s2_idx, dones, episodes)
+
+def _as_arrays(q_raw, control_raw):
+    q = np.frombuffer(q_raw, dtype=np.float64).reshape(-1, N_ACTIONS)
+    control = np.frombuffer(control_raw, dtype=np.float64)
+    return q, control
+
+def _actor_main(actor_id, q_raw, control_raw, out: mp.Queue, env_config,
+                env_seed, agent_seed, batch_size):
+    q, control = _as_arrays(q_raw, control_raw)
+    try:
+        actor = Actor(actor_id, q, control, env_config, env_seed, agent_seed, batch_size)
+        while not control[_STOP]:
+            batch = actor.collect()
+            # Blocks while the learner is behind (bounded queue), checking for stop
+            while True:
+                try:
+                    out.put(batch, timeout=0.1)
+                    break
+                except queue.Full:
+                    if control[_STOP]:
+                        break
+    finally:
+        # Also on errors: the learner stops at the sentinel instead of waiting forever
+        out.put(None)
+
+
+@dataclass
+class DistributedReport:
+    episodes: int
+    transitions: int
+    elapsed: float
+    n_actors: int
+    learner: str
+
+    @property
+    def transitions_per_sec(self) -> float:
+        return self.transitions / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def episodes_per_sec(self) -> float:
+        return self.episodes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def train_distributed(trainer, n_episodes: int = 1000, n_actors: int = 4, batch_size: int = 2048,
+                      learner: str = "batch", queue_size: int = 8) -> DistributedReport:
+    """
+    Entrenamiento actor/learner: n_actors procesos, cada uno con su LaneEnv
+    sembrado, generan transiciones con la tabla Q compartida (RawArray) y el
+    proceso principal aplica las actualizaciones sobre esa misma tabla.
+
+    learner="sequential" aplica learn() transición a transición (mismas
+    cuentas que QLearningAgent.learn); "batch" usa learn_batch (media de los
+    errores TD repetidos en el lote), mucho más rápido con muchos actores.
+
+    Con n_actors=0 los actores (uno por defecto) se ejecutan en este mismo
+    proceso por turnos: resultado determinista para una semilla dada.
+
+    Los episodios se añaden a trainer.stats y epsilon decae por episodio
+    terminado. Se para tras el lote en el que se alcanzan n_episodes.
+    """
+    agent = trainer.agent
+    if not isinstance(agent, DenseQLearningAgent):
+        raise TypeError("train_distributed requires the dense Q-table (agent_backend='dense')")
+    if learner not in LEARNER_MODES:
+        raise ValueError(f"learner must be one of {LEARNER_MODES}")
+
+    inline = n_actors == 0
+    n_workers = 1 if inline else n_actors
+    base_seed = trainer.env.rng.randrange(2**31)
+    seeds = [(base_seed + i, base_seed + 10_000 + i) for i in range(n_workers)]
+
+    env = trainer.env
+    env_config = {"horizon": env.horizon, "spawn_prob": env.spawn_prob,
+                  "n_lanes": env.n_lanes, "window": env.window}
+    q_raw = mp.RawArray("d", agent.q.size)
+    control_raw = mp.RawArray("d", 2)
+    q, control = _as_arrays(q_raw, control_raw)
+    q[:] = agent.q
+    control[_EPSILON] = agent.epsilon
+
+    # The learner updates the shared table in place
+    own_q = agent.q
+    agent.q = q
+    apply = agent.learn_batch_indices if learner == "batch" else agent.learn_indices
+
+    episodes = 0
+    transitions = 0
+
+    def consume(batch: TransitionBatch):
+        nonlocal episodes, transitions
+        apply(batch.s, batch.a, batch.r, batch.s2, batch.done)
+        transitions += len(batch)
+        for distance, total, crashed in batch.episodes:
+            agent.decay()
+            trainer.stats.add_episode(distance=distance, total_reward=total, crashed=crashed,
+                                      epsilon=agent.epsilon)
+        episodes += len(batch.episodes)
+        control[_EPSILON] = agent.epsilon
+
+    t0 = time.perf_counter()
+    try:
+        if inline:
+            actors = [Actor(i, q, control, env_config, es, ags, batch_size)
+                      for i, (es, ags) in enumerate(seeds)]
+            while episodes < n_episodes:
+                for actor in actors:
+                    consume(actor.collect())
+        else:
+            out = mp.Queue(maxsize=queue_size)
+            procs = [mp.Process(target=_actor_main, name=f"actor-{i}", daemon=True,
+                                args=(i, q_raw, control_raw, out, env_config, es, ags, batch_size))
+                     for i, (es, ags) in enumerate(seeds)]
+            for p in procs:
+                p.start()
+            try:
+                while episodes < n_episodes:
+                    try:
+                        batch = out.get(timeout=1.0)
+                    except queue.Empty:
+                        # An actor killed before its sentinel (e.g. by a signal) never sends one
+                        for p in procs:
+                            if p.exitcode is not None:
+                                raise RuntimeError(f"{p.name} exited unexpectedly (exit code {p.exitcode})")
+                        continue
+                    if batch is None:
+                        raise RuntimeError("actor exited unexpectedly")
+                    consume(batch)
+            finally:
+                control[_STOP] = 1.0
+                # Drain until every actor has sent its final sentinel, so none stays blocked on put()
+                finished = 0
+                while finished < len(procs):
+                    try:
+                        if out.get(timeout=1.0) is None:
+                            finished += 1
+                    except queue.Empty:
+                        if not any(p.is_alive() for p in procs):
+                            break
+                for p in procs:
+                    p.join(timeout=1.0)
+    finally:
+        own_q[:] = q
+        agent.q = own_q
+    elapsed = time.perf_counter() - t0
+
+    return DistributedReport(episodes=episodes, transitions=transitions, elapsed=elapsed,
+                             n_actors=n_actors, learner=learner)
@@ -1,6 +1,11 @@
 import random
+from collections import deque
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+# Distance bins returned by _bin_dist (0..5); with a lane window, lanes off the road read WALL_BIN
+N_BINS = 6
+WALL_BIN = N_BINS
 
 @dataclass
 class Obstacle:
@@ -8,24 +13,63 @@ class Obstacle:
     y: int
 
 class LaneEnv:
-    def __init__(self, horizon: int = 12, spawn_prob: float = 0.35, seed: int = 7):
+    def __init__(self, horizon: int = 12, spawn_prob: float = 0.35, seed: int = 7,
+                 n_lanes: int = 3, window: Optional[int] = None):
+        """
+        :param n_lanes: Número de carriles (el coche empieza en el central).
+        :param window: Si se da, el estado solo ve los carriles a distancia
+            <= window del coche (2*window+1 bins, WALL_BIN fuera de la
+            carretera) en lugar de (car_lane, bin de cada carril).
+        """
+        if n_lanes < 1:
+            raise ValueError("n_lanes must be >= 1")
         self.horizon = horizon
         self.spawn_prob = spawn_prob
+        self.n_lanes = n_lanes
+        self.window = window
+        self.min_gap = 3
         self.rng = random.Random(seed)
+
+        # dist (0..horizon) -> bin, precomputed once for this horizon
+        self._bin_table = [self._bin_dist(d) for d in range(horizon + 1)]
         
         # State
-        self.car_lane = 1  # 0, 1, 2
-        self.obstacles: List[Obstacle] = []
+        self.start_lane = n_lanes // 2
+        self.car_lane = self.start_lane  # 0..n_lanes-1
         self.step_count = 0
         self.done = False
 
+        # Obstacles are stored per lane as the global tick at which they spawned,
+        # oldest first, so y = horizon - (tick - spawn_tick) and nothing has to be
+        # decremented per step. The front of each queue is the nearest obstacle.
+        self._tick = 0
+        self._lanes: List[deque] = [deque() for _ in range(n_lanes)]
+        self._last_spawn = None
+        self._classic = n_lanes == 3 and window is None
+
+    @property
+    def state_dims(self) -> Tuple[int, ...]:
+        """Número de valores posibles de cada componente de state()."""
+        if self.window is not None:
+            return (N_BINS + 1,) * (2 * self.window + 1)
+        return (self.n_lanes,) + (N_BINS,) * self.n_lanes
+
     def reset(self):
-        self.car_lane = 1
-        self.obstacles = []
+        self.car_lane = self.start_lane
+        for q in self._lanes:
+            q.clear()
+        self._last_spawn = None
         self.step_count = 0
         self.done = False
         return self.state()
 
+    @property
+    def obstacles(self) -> List[Obstacle]:
+        """Obstáculos activos en orden de aparición (vista de compatibilidad para la UI)."""
+        tick, h = self._tick, self.horizon
+        spawned = sorted((t, lane) for lane, q in enumerate(self._lanes) for t in q)
+        return [Obstacle(lane=lane, y=h - (tick - t)) for t, lane in spawned]
+
     def _bin_dist(self, d: int) -> int:
         # 0..5 based on distance
         # 0: very close/crash, 1: close, ... 5: far
@@ -39,63 +83,71 @@ class LaneEnv:
 
     def state(self):
         """
-        Estado mejorado para aprender rápido:
+        Estado mejorado para aprender rápido (3 carriles, sin ventana):
         - car_lane: 0..2
         - nearest_dist_left_bin: 0..5
         - nearest_dist_mid_bin: 0..5
         - nearest_dist_right_bin: 0..5
+        Con n_lanes carriles: (car_lane, bin de cada carril). Con window=k:
+        bins de los carriles car_lane-k..car_lane+k (WALL_BIN fuera de la carretera).
         """
-        dists = [self.horizon, self.horizon, self.horizon]
-        for ob in self.obstacles:
-            # Distance from car (y=0 implicito relative to bottom if we think logic, 
-            # but usually in these games y goes 0 to horizon. Let's assume car is at y=0 and obstacles at y>0)
-            # Or if visual is top-down: car at bottom.
-            # Let's simplify: distance = ob.y - car_y.
-            # Actually user snippet says "ob.y <= dists[ob.lane]", implying ob.y is the distance? 
-            # Let's assume obstacles come from horizon down to 0, car is at 0.
-            # Wait, if ob.y is distance, then 0 is crash.
-            
-            if 0 <= ob.y <= dists[ob.lane]:
-                dists[ob.lane] = ob.y
+        # Obstacles come from horizon down to 0, car is at 0: distance is y,
+        # and the nearest obstacle of a lane is the front of its queue.
+        base = self.horizon - self._tick
+        table = self._bin_table
+        if self._classic:
+            l0, l1, l2 = self._lanes
+            return (
+                self.car_lane,
+                table[base + l0[0]] if l0 else table[self.horizon],
+                table[base + l1[0]] if l1 else table[self.horizon],
+                table[base + l2[0]] if l2 else table[self.horizon],
+            )
+
+        far = table[self.horizon]
+        if self.window is None:
+            return (self.car_lane,) + tuple([table[base + q[0]] if q else far for q in self._lanes])
 
-        return (self.car_lane, self._bin_dist(dists[0]), self._bin_dist(dists[1]), self._bin_dist(dists[2]))
+        lanes = self._lanes
+        n = self.n_lanes
+        out = []
+        for lane in range(self.car_lane - self.window, self.car_lane + self.window + 1):
+            if lane < 0 or lane >= n:
+                out.append(WALL_BIN)
+            else:
+                q = lanes[lane]
+                out.append(table[base + q[0]] if q else far)
+        return tuple(out)
 
     def step(self, action: int):
         # Action: 0=Left, 1=Stay, 2=Right
         if action == 0:
             self.car_lane = max(0, self.car_lane - 1)
         elif action == 2:
-            self.car_lane = min(2, self.car_lane + 1)
+            self.car_lane = min(self.n_lanes - 1, self.car_lane + 1)
         
-        # Move obstacles (decrease y)
+        # Move obstacles: advancing the tick lowers every y by one.
         # We spawn at `horizon`, they move to 0. Car is at 0.
-        # So "distance" is exactly y.
-        
-        crashed = False
-        new_obs = []
-        for ob in self.obstacles:
-            ob.y -= 1
-            if ob.y < 0:
-                continue # Passed
-            
-            # Check collision
-            if ob.y == 0 and ob.lane == self.car_lane:
-                crashed = True
-            
-            new_obs.append(ob)
-        
-        self.obstacles = new_obs
+        self._tick += 1
+        oldest = self._tick - self.horizon  # spawn tick of an obstacle now at y == 0
+        for q in self._lanes:
+            while q and q[0] < oldest:
+                q.popleft()  # Passed (y < 0)
+
+        # Check collision
+        q = self._lanes[self.car_lane]
+        crashed = bool(q) and q[0] == oldest
         
         # Spawn new?
-        # Enforce "one at a time" / minimum gap
-        min_gap = 3
-        too_close = any(ob.y > (self.horizon - min_gap) for ob in self.obstacles)
+        # Enforce "one at a time" / minimum gap: the newest obstacle is the only one that can be too close
+        since = self._tick - self._last_spawn if self._last_spawn is not None else None
+        too_close = since is not None and since < self.min_gap and since <= self.horizon
 
         if not too_close and self.rng.random() < self.spawn_prob:
             # Pick lane
-            l = self.rng.randint(0, 2)
-            # Avoid impossible walls logic if wanted, but simpler:
-            self.obstacles.append(Obstacle(lane=l, y=self.horizon))
+            l = self.rng.randint(0, self.n_lanes - 1)
+            self._lanes[l].append(self._tick)
+            self._last_spawn = self._tick
             
         self.step_count += 1
         
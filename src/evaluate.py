@@ -0,0 +1,281 @@
+import argparse
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.agent import N_ACTIONS
+from src.vec_env import VecLaneEnv
+
+# Evaluation envs use seeds EVAL_SEED, EVAL_SEED + 1, ...: far from the training and UI seeds
+EVAL_SEED = 1_000_000
+
+# Episodes per vectorized chunk (and per task in the process pool). Tie-breaking draws
+# are seeded per chunk, so results do not depend on the number of workers.
+CHUNK_SIZE = 1024
+
+# Policies over at most this many states are looked up in a dense table
+DIRECT_TABLE_STATES = 1 << 20
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Two-sided 95% normal quantile for the confidence intervals
+Z_95 = 1.959963984540054
+
+class GreedyPolicy:
+    """
+    Política voraz congelada de un agente: copia de las filas Q de los estados
+    visitados, ordenadas por su índice en state_dims. Los estados que el
+    agente no conoce valen Q = 0 (empate entre las tres acciones), como en act().
+
+    No guarda referencias al agente: se puede seguir entrenando mientras se
+    evalúa, y se envía entera a los procesos de evaluación.
+    """
+
+    def __init__(self, state_dims: Tuple[int, ...], keys: np.ndarray, q: np.ndarray):
+        order = np.argsort(keys, kind="stable")
+        self.state_dims = tuple(state_dims)
+        self.keys = np.asarray(keys, dtype=np.int64)[order]
+        self.q = np.asarray(q, dtype=np.float64)[order]
+        # Small layouts get a full table indexed directly; big ones search the sorted keys
+        self._table = None
+        n_states = math.prod(self.state_dims)
+        if n_states <= DIRECT_TABLE_STATES:
+            self._table = np.zeros((n_states, N_ACTIONS))
+            self._table[self.keys] = self.q
+
+    @classmethod
+    def from_agent(cls, agent, state_dims: Tuple[int, ...]) -> "GreedyPolicy":
+        """Congela la tabla Q de un agente dict, hashed o dense (sin tocar su RNG ni su LRU)."""
+        if hasattr(agent, "visited"):
+            keys = np.flatnonzero(agent.visited)
+            return cls(state_dims, keys, agent.q[keys])
+        q_table = agent.q_table
+        if not q_table:
+            return cls(state_dims, np.empty(0, dtype=np.int64), np.empty((0, N_ACTIONS)))
+        states = np.array(list(q_table.keys()), dtype=np.intp)
+        keys = np.ravel_multi_index(states.T, state_dims)
+        return cls(state_dims, keys, np.array(list(q_table.values()), dtype=np.float64))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def actions(self, states: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Acción voraz de cada fila de states (n, len(state_dims)); empates al azar con rng."""
+        keys = np.ravel_multi_index(states.T, self.state_dims)
+        if self._table is not None:
+            q = self._table[keys]
+        else:
+            q = self._lookup(keys)
+        # Random tie-breaking as in DenseQLearningAgent.act_batch
+        is_max = q == q.max(axis=1, keepdims=True)
+        return np.where(is_max, rng.random(q.shape), -1.0).argmax(axis=1)
+
+    def _lookup(self, keys: np.ndarray) -> np.ndarray:
+        q = np.zeros((len(keys), N_ACTIONS))
+        if len(self.keys):
+            pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+            found = self.keys[pos] == keys
+            q[found] = self.q[pos[found]]
+        return q
+
+
+@dataclass
+class EvalReport:
+    """
+    Distribución de distancias de una evaluación voraz. Las distancias de los
+    episodios que llegan a max_steps se cuentan como max_steps (truncados, no
+    choques), así que con muchos truncados la media es una cota inferior.
+    Intervalos al 95%: normal para la media, Wilson para la tasa de choques y
+    por estadísticos de orden (sin suponer distribución) para la mediana.
+    """
+    episodes: int
+    max_steps: int
+    seed: int
+    mean: float
+    std: float
+    mean_ci: Tuple[float, float]
+    median_ci: Tuple[float, float]
+    percentiles: Dict[int, float]
+    crash_rate: float
+    crash_rate_ci: Tuple[float, float]
+    truncated: int
+    steps: int
+    elapsed: float
+    distances: np.ndarray = field(repr=False)
+
+    def as_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["distances"] = self.distances.tolist()
+        return d
+
+    def format(self) -> str:
+        pct = "  ".join(f"p{p} {v:.0f}" for p, v in self.percentiles.items())
+        return "\n".join([
+            f"eval episodes:   {self.episodes} (seeds {self.seed}.., cap {self.max_steps} steps, "
+            f"{self.truncated} truncated)",
+            f"eval distance:   mean {self.mean:.1f} [{self.mean_ci[0]:.1f}, {self.mean_ci[1]:.1f}]  "
+            f"std {self.std:.1f}",
+            f"eval median:     {self.percentiles[50]:.0f} [{self.median_ci[0]:.0f}, {self.median_ci[1]:.0f}]",
+            f"eval pcts:       {pct}",
+            f"eval crash rate: {self.crash_rate * 100:.1f}% "
+            f"[{self.crash_rate_ci[0] * 100:.1f}%, {self.crash_rate_ci[1] * 100:.1f}%]",
+            f"eval elapsed:    {self.elapsed:.2f}s ({self.steps / max(self.elapsed, 1e-9):.0f} steps/s)",
+        ])
+
+def wilson_interval(k: int, n: int, z: float = Z_95) -> Tuple[float, float]:
+    """Intervalo de Wilson para una proporción k/n."""
+    if n == 0:
+        return 0.0, 1.0
+    p = k / n
+    den = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / den
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / den
+    return max(0.0, center - half), min(1.0, center + half)
+
+def summarize(distances: np.ndarray, crashed: np.ndarray, max_steps: int, seed: int,
+              elapsed: float = 0.0) -> EvalReport:
+    """EvalReport de las distancias y choques de una evaluación."""
+    n = len(distances)
+    d = np.sort(distances.astype(np.float64))
+    mean = float(d.mean())
+    std = float(d.std(ddof=1)) if n > 1 else 0.0
+    half = Z_95 * std / math.sqrt(n)
+    # Ranks around n/2 that bracket the median with ~95% probability (binomial(n, 1/2))
+    lo = max(0, int(math.floor(n / 2 - Z_95 * math.sqrt(n) / 2)))
+    hi = min(n - 1, int(math.ceil(n / 2 + Z_95 * math.sqrt(n) / 2)))
+    crashes = int(crashed.sum())
+    return EvalReport(
+        episodes=n,
+        max_steps=max_steps,
+        seed=seed,
+        mean=mean,
+        std=std,
+        mean_ci=(mean - half, mean + half),
+        median_ci=(float(d[lo]), float(d[hi])),
+        percentiles={p: float(v) for p, v in zip(PERCENTILES, np.percentile(d, PERCENTILES))},
+        crash_rate=crashes / n,
+        crash_rate_ci=wilson_interval(crashes, n),
+        truncated=n - crashes,
+        steps=int(distances.sum()),
+        elapsed=elapsed,
+        distances=distances,
+    )
+
+
+def run_chunk(policy: GreedyPolicy, seed: int, n_envs: int, max_steps: int,
+              env_config: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Un episodio voraz en cada uno de n_envs entornos (semillas seed..seed+n_envs-1)
+    en un VecLaneEnv; los que terminan salen del lote. Devuelve (distancias, choques).
+    """
+    env = VecLaneEnv(n_envs, seed=seed, **env_config)
+    rng = np.random.default_rng(seed)
+    distance = np.full(n_envs, max_steps, dtype=np.int64)
+    crashed = np.zeros(n_envs, dtype=bool)
+    rows = np.arange(n_envs)  # original position of each live sub-env
+
+    states = env.reset()
+    for _ in range(max_steps):
+        states, _, done, info = env.step(policy.actions(states, rng))
+        if done.any():
+            ended = np.flatnonzero(done)
+            distance[rows[ended]] = info["distance"][ended]
+            crashed[rows[ended]] = True
+            live = np.flatnonzero(~done)
+            if not live.size:
+                break
+            env.keep(live)
+            rows = rows[live]
+            states = states[live]
+    return distance, crashed
+
+def evaluate_policy(policy: GreedyPolicy, n_episodes: int = 1000, max_steps: int = 10_000,
+                    seed: int = EVAL_SEED, env_config: Optional[Dict[str, Any]] = None,
+                    workers: int = 0) -> EvalReport:
+    """
+    Evalúa la política en n_episodes entornos con semillas seed, seed + 1, ...
+    (un episodio cada uno, truncado a max_steps), en trozos de CHUNK_SIZE
+    entornos vectorizados; workers > 0 reparte los trozos en un pool de
+    procesos y workers=0 los corre aquí. env_config: argumentos de VecLaneEnv
+    (horizon, spawn_prob, n_lanes, window).
+    """
+    env_config = dict(env_config or {})
+    t0 = time.perf_counter()
+    chunks = [(seed + start, min(CHUNK_SIZE, n_episodes - start)) for start in range(0, n_episodes, CHUNK_SIZE)]
+    if workers == 0 or len(chunks) <= 1:
+        results = [run_chunk(policy, s, n, max_steps, env_config) for s, n in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_chunk, policy, s, n, max_steps, env_config) for s, n in chunks]
+            results = [fut.result() for fut in futures]
+    distances = np.concatenate([d for d, _ in results])
+    crashed = np.concatenate([c for _, c in results])
+    return summarize(distances, crashed, max_steps, seed, elapsed=time.perf_counter() - t0)
+
+def env_config_of(env) -> Dict[str, Any]:
+    """Argumentos de VecLaneEnv con la misma dinámica que un LaneEnv."""
+    return {"horizon": env.horizon, "spawn_prob": env.spawn_prob, "n_lanes": env.n_lanes, "window": env.window}
+
+
+class EvalMonitor:
+    """
+    Callback para Trainer.train que evalúa la política voraz cada `every`
+    episodios y guarda (episodios entrenados, EvalReport) en history.
+    Solo lee la tabla Q: no toca el entorno ni los RNG del entrenamiento.
+    """
+
+    def __init__(self, trainer, every: int = 500, verbose: bool = False, **eval_kwargs):
+        self.trainer = trainer
+        self.every = every
+        self.verbose = verbose
+        self.eval_kwargs = eval_kwargs
+        self.history: List[Tuple[int, EvalReport]] = []
+
+    def __call__(self, done: int, total: int) -> bool:
+        if done % self.every == 0 or done == total:
+            report = self.trainer.evaluate(**self.eval_kwargs)
+            episodes = len(self.trainer.stats.distances)
+            self.history.append((episodes, report))
+            if self.verbose:
+                print(f"[eval @ {episodes}] mean {report.mean:.1f} median {report.percentiles[50]:.0f} "
+                      f"crash {report.crash_rate * 100:.1f}%")
+        return True
+
+
+def main(argv=None):
+    """Evaluación voraz de un checkpoint o de un entrenamiento nuevo: python -m src.evaluate"""
+    parser = argparse.ArgumentParser(description="Evaluate a frozen greedy policy over many seeded LaneEnvs")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--resume", metavar="PATH", help="checkpoint written by src.train --checkpoint")
+    source.add_argument("--train", type=int, metavar="EPISODES", help="train a fresh Trainer first")
+    parser.add_argument("--episodes", type=int, default=10_000, help="evaluation episodes (one seed each)")
+    parser.add_argument("--max-steps", type=int, default=10_000, help="truncate evaluation episodes at this length")
+    parser.add_argument("--eval-seed", type=int, default=EVAL_SEED)
+    parser.add_argument("--workers", type=int, default=0, help="processes (0 = this process)")
+    parser.add_argument("--backend", default="dict")
+    parser.add_argument("--horizon", type=int, default=12)
+    parser.add_argument("--spawn-prob", type=float, default=0.35)
+    parser.add_argument("--n-lanes", type=int, default=3)
+    parser.add_argument("--window", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    if args.resume:
+        from src.checkpoint import load_checkpoint
+        trainer = load_checkpoint(args.resume)
+    else:
+        from src.train import Trainer
+        trainer = Trainer(horizon=args.horizon, spawn_prob=args.spawn_prob, seed=args.seed,
+                          agent_backend=args.backend, n_lanes=args.n_lanes, window=args.window)
+        trainer.train(n_episodes=args.train)
+
+    report = trainer.evaluate(n_episodes=args.episodes, max_steps=args.max_steps, seed=args.eval_seed,
+                              workers=args.workers)
+    print(report.format())
+
+if __name__ == "__main__":
+    main()
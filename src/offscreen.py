@@ -0,0 +1,261 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+# pygame prints a banner to stdout on import, which would corrupt frames streamed there
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+
+from src.env import Obstacle
+from src.render import RoadPainter
+from src.render_cache import FontCache, TextCache
+from src.series import MinMaxPyramid
+from src.trajectory import EpisodeArchive, Trajectory
+
+FRAME_FORMATS = ("png", "raw")
+
+# Frames of the crash effect after a crashed episode's last step (no clock here, so counted in frames)
+CRASH_FRAMES = 15
+
+# Scene (left) and one chart (right); even sizes, as video encoders expect
+FRAME_WIDTH = 720
+FRAME_HEIGHT = 600
+
+# Raw frames are the renderer surface's own pixels (0x00RRGGBB words), copied without conversion
+_MASKS = (0xFF0000, 0x00FF00, 0x0000FF, 0)
+RAW_PIX_FMT = "bgr0" if sys.byteorder == "little" else "0rgb"
+
+class ReplayRenderer(RoadPainter):
+    """
+    Dibuja episodios grabados (Trajectory) en una Surface fuera de pantalla,
+    sin ventana ni reloj: la escena de GameUI a la izquierda y, a la derecha,
+    la recompensa acumulada del episodio hasta el paso actual.
+    """
+
+    def __init__(self, n_lanes: int = 3, width: int = FRAME_WIDTH, height: int = FRAME_HEIGHT):
+        pygame.font.init()
+        super().__init__(n_lanes, TextCache(FontCache()), width, height)
+        self.chart_x = 400
+        self.background = self._build_background()
+        self.surface = pygame.Surface((width, height), 0, 32, _MASKS)
+
+    def frames(self, traj: Trajectory, title: str = "", stride: int = 1) -> Iterator[pygame.Surface]:
+        """
+        Genera los frames del episodio: el estado tras reset, uno cada `stride`
+        pasos (siempre incluido el último) y, si chocó, la animación de choque.
+        Se reutiliza la misma Surface: hay que consumir cada frame antes de pedir el siguiente.
+        """
+        n = len(traj)
+        cum_reward = np.cumsum(traj.reward, dtype=np.float64)
+        self._reward_chart = MinMaxPyramid(cum_reward)
+        start_lane = self.n_lanes // 2
+
+        self._draw_frame(traj, cum_reward, 0, start_lane, [], title)
+        yield self.surface
+        for step in range(1, n + 1):
+            if step % stride and step != n:
+                continue
+            lane = int(traj.car_lane[step - 1])
+            obstacles = [Obstacle(lane=l, y=y) for l, y in traj.obstacles_at(step - 1)]
+            self._draw_frame(traj, cum_reward, step, lane, obstacles, title)
+            yield self.surface
+
+        if n and traj.crashed[n - 1]:
+            for k in range(1, CRASH_FRAMES + 1):
+                self._draw_frame(traj, cum_reward, n, lane, obstacles, title, crash=k / CRASH_FRAMES)
+                yield self.surface
+
+    def _draw_frame(self, traj, cum_reward, step, lane, obstacles, title, crash=None):
+        # cum_reward[i]: total reward after step i + 1
+        screen = self.surface
+        screen.blit(self.background, (0, 0))
+        self._draw_obstacles(screen, obstacles)
+        self._draw_car(screen, lane)
+        if crash is not None:
+            self._draw_crash(screen, lane, crash)
+
+        mx = self.padding_left
+        my = 50
+        screen.blit(self.text.render(f"Distance: {step}", (255, 255, 255), size=18), (mx + 10, my + 10))
+
+        lo, hi = self._reward_chart.envelope(0, step, 290)
+        self._draw_line_chart(screen, self.chart_x, my, 300, 100, lo, hi, color=(180, 255, 180),
+                              label="Recompensa acumulada")
+        reward = float(cum_reward[step - 1]) if step else 0.0
+        screen.blit(self.text.render(f"Paso {step}/{len(traj)}  recompensa {reward:.0f}", (230, 230, 230)),
+                    (self.chart_x, my + 110))
+        if title:
+            screen.blit(self.text.render(title, (255, 255, 255), size=18), (mx, self.height - 40))
+
+
+def write_png_frames(frames: Iterator[pygame.Surface], out_dir: str) -> int:
+    """Guarda cada frame como out_dir/frame_000000.png, ...; devuelve cuántos."""
+    os.makedirs(out_dir, exist_ok=True)
+    count = 0
+    for count, surf in enumerate(frames, 1):
+        pygame.image.save(surf, os.path.join(out_dir, f"frame_{count - 1:06d}.png"))
+    return count
+
+def write_raw_frames(frames: Iterator[pygame.Surface], stream: BinaryIO) -> int:
+    """
+    Escribe cada frame sin cabecera, 4 bytes por píxel en formato RAW_PIX_FMT
+    (ffmpeg -f rawvideo -pix_fmt bgr0); devuelve cuántos.
+    """
+    count = 0
+    for count, surf in enumerate(frames, 1):
+        stream.write(surf.get_buffer().raw)
+    return count
+
+
+@dataclass
+class ReplayJob:
+    """Un episodio a exportar: del archivo de episodios (archive_path, index) o un Trajectory en memoria."""
+    name: str
+    title: str = ""
+    archive_path: Optional[str] = None
+    index: int = -1
+    trajectory: Optional[Trajectory] = None
+
+    def load(self) -> Trajectory:
+        if self.trajectory is not None:
+            return self.trajectory
+        return EpisodeArchive(self.archive_path).trajectory(self.index)
+
+@dataclass
+class ReplayResult:
+    name: str
+    path: str
+    frames: int
+    seconds: float
+
+    @property
+    def frames_per_sec(self) -> float:
+        return self.frames / self.seconds if self.seconds > 0 else 0.0
+
+# One renderer per process, reused across jobs with the same layout
+_renderer: Optional[ReplayRenderer] = None
+
+def _get_renderer(n_lanes: int) -> ReplayRenderer:
+    global _renderer
+    if _renderer is None or _renderer.n_lanes != n_lanes:
+        _renderer = ReplayRenderer(n_lanes=n_lanes)
+    return _renderer
+
+def render_job(job: ReplayJob, out_dir: str, fmt: str = "png", n_lanes: int = 3, stride: int = 1) -> ReplayResult:
+    """Exporta un episodio: out_dir/<name>/ con PNGs u out_dir/<name>.raw con frames sin cabecera."""
+    t0 = time.perf_counter()
+    renderer = _get_renderer(n_lanes)
+    frames = renderer.frames(job.load(), title=job.title, stride=stride)
+    if fmt == "png":
+        path = os.path.join(out_dir, job.name)
+        count = write_png_frames(frames, path)
+    else:
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, job.name + ".raw")
+        with open(path, "wb") as f:
+            count = write_raw_frames(frames, f)
+    return ReplayResult(name=job.name, path=path, frames=count, seconds=time.perf_counter() - t0)
+
+def export_replays(jobs: Sequence[ReplayJob], out_dir: str, fmt: str = "png", n_lanes: int = 3,
+                   stride: int = 1, workers: Optional[int] = None) -> List[ReplayResult]:
+    """
+    Exporta los episodios en un pool de procesos (uno por episodio a la vez).
+    workers=0 los exporta en este proceso. Los resultados siguen el orden de jobs.
+    """
+    if fmt not in FRAME_FORMATS:
+        raise ValueError(f"fmt must be one of {FRAME_FORMATS}")
+    if workers == 0 or len(jobs) <= 1:
+        return [render_job(job, out_dir, fmt, n_lanes, stride) for job in jobs]
+
+    results: List[Optional[ReplayResult]] = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(render_job, job, out_dir, fmt, n_lanes, stride): k for k, job in enumerate(jobs)}
+        for fut in as_completed(futures):
+            results[futures[fut]] = fut.result()
+    return results
+
+def trainer_jobs(trainer, indices: Optional[Sequence[int]] = None, best: bool = True) -> List[ReplayJob]:
+    """
+    Trabajos para los episodios guardados de un Trainer (trainer.episodes):
+    los de `indices` y, con best, el de trainer.best_idx (como "best_episode_<i>").
+    Con archivo de episodios, los procesos leen del archivo en lugar de recibir los arrays.
+    """
+    wanted = list(indices) if indices is not None else []
+    best_idx = trainer.best_idx if best else None
+    if best_idx is not None and best_idx not in wanted:
+        wanted.insert(0, best_idx)
+
+    jobs = []
+    for i in wanted:
+        rec = trainer.episodes[i]
+        name = f"{'best_' if i == best_idx else ''}episode_{i:05d}"
+        title = f"Episodio {i}: distancia {rec.distance}, recompensa {rec.total_reward:.0f}"
+        if trainer.archive is not None:
+            jobs.append(ReplayJob(name=name, title=title, archive_path=trainer.archive.path, index=i))
+        else:
+            jobs.append(ReplayJob(name=name, title=title, trajectory=rec.trajectory))
+    return jobs
+
+
+def main(argv=None):
+    """Exporta episodios grabados sin pantalla: python -m src.offscreen --archive episodios.arc"""
+    parser = argparse.ArgumentParser(description="Render recorded episodes offscreen to PNG sequences or raw frames")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--archive", help="episode archive written by src.train --archive")
+    source.add_argument("--train", type=int, metavar="EPISODES", help="train a fresh Trainer headless and render its kept episodes")
+    parser.add_argument("--episodes", type=int, nargs="+", default=None, metavar="I", help="indices of the episodes to render")
+    parser.add_argument("--all", action="store_true", help="render every kept episode")
+    parser.add_argument("--no-best", dest="best", action="store_false", help="do not add the best episode")
+    parser.add_argument("--format", choices=FRAME_FORMATS, default="png")
+    parser.add_argument("--out", default="replays",
+                        help="output directory; '-' streams raw frames of every episode to stdout, in order")
+    parser.add_argument("--stride", type=int, default=1, help="render every Nth step")
+    parser.add_argument("--workers", type=int, default=None, help="processes (0 = this process)")
+    parser.add_argument("--n-lanes", type=int, default=3)
+    parser.add_argument("--horizon", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep-every", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    # Archives do not store the layout: --n-lanes must match the run that wrote it
+    from src.train import Trainer
+    trainer = Trainer(horizon=args.horizon, seed=args.seed, n_lanes=args.n_lanes, archive_path=args.archive)
+    if args.train:
+        trainer.train(n_episodes=args.train, keep_every=args.keep_every)
+    if not trainer.episodes:
+        parser.error("no recorded episodes")
+    indices = range(len(trainer.episodes)) if args.all else args.episodes
+    jobs = trainer_jobs(trainer, indices=indices, best=args.best)
+
+    to_stdout = args.out == "-"
+    if to_stdout and args.format != "raw":
+        parser.error("--out - needs --format raw")
+    log = sys.stderr if to_stdout else sys.stdout
+
+    t0 = time.perf_counter()
+    if to_stdout:
+        renderer = ReplayRenderer(n_lanes=args.n_lanes)
+        frames = sum(write_raw_frames(renderer.frames(job.load(), job.title, args.stride), sys.stdout.buffer)
+                     for job in jobs)
+        sys.stdout.buffer.flush()
+    else:
+        results = export_replays(jobs, args.out, fmt=args.format, n_lanes=args.n_lanes,
+                                 stride=args.stride, workers=args.workers)
+        for res in results:
+            print(f"{res.path}: {res.frames} frames ({res.frames_per_sec:.0f} frames/s)", file=log)
+        frames = sum(res.frames for res in results)
+    elapsed = max(time.perf_counter() - t0, 1e-9)
+
+    print(f"{len(jobs)} episodes, {frames} frames in {elapsed:.2f}s ({frames / elapsed:.0f} frames/s)", file=log)
+    if args.format == "raw":
+        print(f"encode with: ffmpeg -f rawvideo -pix_fmt {RAW_PIX_FMT} -s {FRAME_WIDTH}x{FRAME_HEIGHT} -r 30 "
+              f"-i <frames.raw> out.mp4", file=log)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.env import LaneEnv
+from src.agent import N_ACTIONS, N_STATES, State, index_state, state_index
+
+# Same rewards as LaneEnv.step
+STEP_REWARD = 1.0
+CRASH_REWARD = -10.0
+
+# Exact env configuration: (car_lane, ((y, lane), ...)) with obstacles sorted by y.
+# Spawns are at least min_gap apart, so the newest obstacle tells whether a spawn is allowed.
+Config = Tuple[int, Tuple[Tuple[int, int], ...]]
+
+@dataclass
+class LaneModel:
+    """
+    Dinámica exacta tabulada de LaneEnv en formato disperso.
+
+    Cada transición k sale del par (estado, acción) row[k] = s * N_ACTIONS + a,
+    llega a next_state[k] con probabilidad prob[k] y da reward[k]; done[k]
+    marca los choques (terminales). obs[s] es el índice del State agrupado
+    (car_lane, dL, dM, dR) que ve el agente en el estado exacto s.
+    """
+    horizon: int
+    spawn_prob: float
+    configs: List[Config]
+    row: np.ndarray         # intp[k]
+    next_state: np.ndarray  # intp[k]
+    prob: np.ndarray        # float64[k]
+    reward: np.ndarray      # float64[k]
+    done: np.ndarray        # bool[k]
+    obs: np.ndarray         # intp[n_states]
+    start: int = 0          # LaneEnv.reset() configuration
+
+    @property
+    def n_states(self) -> int:
+        return len(self.configs)
+
+    def q_backup(self, v: np.ndarray, gamma: float) -> np.ndarray:
+        """Q(s, a) = sum_k prob * (reward + gamma * V(next)) para todos los (s, a) a la vez."""
+        cont = np.where(self.done, 0.0, v[self.next_state])
+        contrib = self.prob * (self.reward + gamma * cont)
+        q = np.bincount(self.row, weights=contrib, minlength=self.n_states * N_ACTIONS)
+        return q.reshape(self.n_states, N_ACTIONS)
+
+    def policy_transitions(self, pi: np.ndarray) -> np.ndarray:
+        """Peso de cada transición bajo una política estocástica pi (n_states, N_ACTIONS)."""
+        return self.prob * pi.ravel()[self.row]
+
+
+def _successors(cfg: Config, action: int, horizon: int, min_gap: int,
+                spawn_prob: float) -> List[Tuple[Config, float, float, bool]]:
+    lane, obs = cfg
+    if action == 0:
+        lane = max(0, lane - 1)
+    elif action == 2:
+        lane = min(2, lane + 1)
+
+    moved = tuple((y - 1, l) for y, l in obs if y > 0)
+    crashed = any(y == 0 and l == lane for y, l in moved)
+    if crashed:
+        return [((lane, moved), 1.0, CRASH_REWARD, True)]
+
+    too_close = any(y > horizon - min_gap for y, _ in moved)
+    if too_close or spawn_prob <= 0.0:
+        return [((lane, moved), 1.0, STEP_REWARD, False)]
+
+    out = [((lane, moved + ((horizon, l),)), spawn_prob / 3, STEP_REWARD, False) for l in range(3)]
+    if spawn_prob < 1.0:
+        out.append(((lane, moved), 1.0 - spawn_prob, STEP_REWARD, False))
+    return out
+
+def build_model(horizon: int = 12, spawn_prob: float = 0.35) -> LaneModel:
+    """Enumera las configuraciones alcanzables desde reset() y tabula sus transiciones."""
+    min_gap = LaneEnv(horizon=horizon).min_gap
+    start: Config = (1, ())
+    index: Dict[Config, int] = {start: 0}
+    configs: List[Config] = [start]
+    row, nxt, prob, reward, done = [], [], [], [], []
+
+    i = 0
+    while i < len(configs):
+        cfg = configs[i]
+        for a in range(N_ACTIONS):
+            for c2, p, r, d in _successors(cfg, a, horizon, min_gap, spawn_prob):
+                # Crashes are terminal: their next state is never used, so it is not enumerated
+                j = i if d else index.get(c2)
+                if j is None:
+                    j = index[c2] = len(configs)
+                    configs.append(c2)
+                row.append(i * N_ACTIONS + a)
+                nxt.append(j)
+                prob.append(p)
+                reward.append(r)
+                done.append(d)
+        i += 1
+
+    # Same observation as LaneEnv.state(): binned distance to the nearest obstacle per lane
+    table = LaneEnv(horizon=horizon)._bin_table
+    obs = np.empty(len(configs), dtype=np.intp)
+    for s, (lane, obstacles) in enumerate(configs):
+        dists = [horizon, horizon, horizon]
+        for y, l in obstacles:
+            if y < dists[l]:
+                dists[l] = y
+        obs[s] = state_index((lane, table[dists[0]], table[dists[1]], table[dists[2]]))
+
+    return LaneModel(horizon=horizon, spawn_prob=spawn_prob, configs=configs,
+                     row=np.asarray(row, dtype=np.intp), next_state=np.asarray(nxt, dtype=np.intp),
+                     prob=np.asarray(prob), reward=np.asarray(reward),
+                     done=np.asarray(done, dtype=bool), obs=obs)
+
+
+@dataclass
+class Solution:
+    q: np.ndarray   # float64[n_states, N_ACTIONS], optimal Q over exact configurations
+    v: np.ndarray   # float64[n_states]
+    gamma: float
+    iterations: int
+
+    @property
+    def policy(self) -> np.ndarray:
+        return self.q.argmax(axis=1)
+
+def value_iteration(model: LaneModel, gamma: float = 0.95, tol: float = 1e-8,
+                    max_iter: int = 10_000) -> Solution:
+    """Iteración de valor vectorizada sobre el modelo exacto hasta que max|ΔV| < tol."""
+    v = np.zeros(model.n_states)
+    q = model.q_backup(v, gamma)
+    it = 0
+    for it in range(1, max_iter + 1):
+        q = model.q_backup(v, gamma)
+        v2 = q.max(axis=1)
+        delta = np.abs(v2 - v).max()
+        v = v2
+        if delta < tol:
+            break
+    return Solution(q=q, v=v, gamma=gamma, iterations=it)
+
+def policy_evaluation(model: LaneModel, pi: np.ndarray, gamma: float = 0.95, tol: float = 1e-8,
+                      max_iter: int = 10_000) -> np.ndarray:
+    """Valor exacto V^pi de una política estocástica pi (n_states, N_ACTIONS)."""
+    v = np.zeros(model.n_states)
+    for _ in range(max_iter):
+        v2 = (model.q_backup(v, gamma) * pi).sum(axis=1)
+        delta = np.abs(v2 - v).max()
+        v = v2
+        if delta < tol:
+            break
+    return v
+
+def occupancy(model: LaneModel, pi: np.ndarray, gamma: float = 0.95, tol: float = 1e-10,
+              max_iter: int = 10_000) -> np.ndarray:
+    """Ocupación descontada de cada estado exacto partiendo de reset() y siguiendo pi."""
+    w = model.policy_transitions(pi)
+    src = model.row // N_ACTIONS
+    alive = ~model.done
+    d = np.zeros(model.n_states)
+    d[model.start] = 1.0
+    total = d.copy()
+    for _ in range(max_iter):
+        flow = d[src] * w
+        d = gamma * np.bincount(model.next_state[alive], weights=flow[alive], minlength=model.n_states)
+        total += d
+        if d.sum() < tol:
+            break
+    return total
+
+def _one_hot(actions: np.ndarray) -> np.ndarray:
+    pi = np.zeros((len(actions), N_ACTIONS))
+    pi[np.arange(len(actions)), actions] = 1.0
+    return pi
+
+def _project(model: LaneModel, q_exact: np.ndarray, occ: np.ndarray) -> np.ndarray:
+    # Occupancy-weighted mean per binned State; uniform over the exact states the policy never visits
+    occ_per_obs = np.bincount(model.obs, weights=occ, minlength=N_STATES)
+    weight = np.where(occ_per_obs[model.obs] > 0, occ, 1.0)
+    norm = np.bincount(model.obs, weights=weight, minlength=N_STATES)
+
+    q = np.zeros((N_STATES, N_ACTIONS))
+    for a in range(N_ACTIONS):
+        q[:, a] = np.bincount(model.obs, weights=weight * q_exact[:, a], minlength=N_STATES)
+    seen = norm > 0
+    q[seen] /= norm[seen, None]
+    return q
+
+def _tie_split(model: LaneModel, q_binned: np.ndarray) -> np.ndarray:
+    q = q_binned[model.obs]
+    is_max = q == q.max(axis=1, keepdims=True)
+    return is_max / is_max.sum(axis=1, keepdims=True)
+
+def project_q(model: LaneModel, solution: Solution, refine: int = 4) -> Dict[State, List[float]]:
+    """
+    Proyecta el Q óptimo exacto sobre los State agrupados del agente (media
+    ponderada por la ocupación de la política óptima). Varios estados exactos
+    comparten State, así que después se hacen `refine` rondas de iteración de
+    política sobre políticas agrupadas y se devuelve la mejor desde reset().
+    """
+    gamma = solution.gamma
+    q = _project(model, solution.q, occupancy(model, _one_hot(solution.policy), gamma))
+    best_q, best_v = q, -np.inf
+    for _ in range(refine + 1):
+        pi = _tie_split(model, q)
+        v = policy_evaluation(model, pi, gamma)
+        if v[model.start] > best_v:
+            best_q, best_v = q, v[model.start]
+        if best_v >= solution.v[model.start] - 1e-6:
+            break
+        q = _project(model, model.q_backup(v, gamma), occupancy(model, pi, gamma))
+
+    seen = np.zeros(N_STATES, dtype=bool)
+    seen[model.obs] = True
+    return {index_state(i): best_q[i].tolist() for i in np.flatnonzero(seen)}
+
+def warm_start(agent, q_binned: Dict[State, List[float]]):
+    """Carga un Q agrupado (p. ej. de project_q) en el q_table de cualquier agente."""
+    for state, values in q_binned.items():
+        agent.q_table[state] = list(values)
+
+def greedy_policy(model: LaneModel, q_table) -> np.ndarray:
+    """
+    Política (n_states, N_ACTIONS) del agente greedy con q_table sobre los estados exactos.
+    Los empates se reparten a partes iguales, como el desempate aleatorio de act().
+    """
+    q = np.zeros((N_STATES, N_ACTIONS))
+    for state, values in q_table.items():
+        q[state_index(state)] = values
+    return _tie_split(model, q)
+
+def agent_value(model: LaneModel, agent, gamma: float = 0.95) -> float:
+    """Retorno descontado esperado desde reset() de la política greedy del agente (referencia: V*)."""
+    return float(policy_evaluation(model, greedy_policy(model, agent.q_table), gamma)[model.start])
+
+
+def main(argv=None):
+    """Solución exacta por programación dinámica: python -m src.planning"""
+    parser = argparse.ArgumentParser(description="Exact value iteration on the tabulated LaneEnv dynamics")
+    parser.add_argument("--horizon", type=int, default=12)
+    parser.add_argument("--spawn-prob", type=float, default=0.35)
+    parser.add_argument("--gamma", type=float, default=0.95)
+    parser.add_argument("--tol", type=float, default=1e-8)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    model = build_model(horizon=args.horizon, spawn_prob=args.spawn_prob)
+    t1 = time.perf_counter()
+    sol = value_iteration(model, gamma=args.gamma, tol=args.tol)
+    t2 = time.perf_counter()
+    q_binned = project_q(model, sol)
+    projected = greedy_policy(model, q_binned)
+    v_proj = policy_evaluation(model, projected, args.gamma, args.tol)[model.start]
+    t3 = time.perf_counter()
+
+    print(f"exact states:    {model.n_states}")
+    print(f"transitions:     {len(model.row)}")
+    print(f"model build:     {t1 - t0:.2f}s")
+    print(f"value iteration: {t2 - t1:.2f}s ({sol.iterations} iterations)")
+    print(f"projection:      {t3 - t2:.2f}s ({len(q_binned)} binned states)")
+    print(f"V*(reset):       {sol.v[model.start]:.4f} (upper bound {1 / (1 - args.gamma):.4f})")
+    print(f"binned policy:   {v_proj:.4f}")
+
+if __name__ == "__main__":
+    main()
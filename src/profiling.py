@@ -0,0 +1,103 @@
+import json
+import time
+from typing import Any, Dict, List
+
+# Phases timed inside Trainer.train, in loop order
+PHASES = ("act", "step", "learn", "replay", "record", "update_best")
+
+class Profiler:
+    """
+    Temporizadores por fase y contadores del bucle de entrenamiento.
+
+    Trainer.train solo mide si trainer.profiler existe y está enabled; si no,
+    el bucle no llama a perf_counter ni a este objeto (coste ~cero). Las
+    longitudes de episodio se agrupan en un histograma de potencias de 2:
+    el cubo b cuenta los episodios con 2**(b-1) <= longitud < 2**b.
+    El tamaño de la tabla Q (q_table, la que registra train) se mide solo
+    en snapshot(): en la tabla densa len() recorre todos los estados.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.phase_time: Dict[str, float] = {p: 0.0 for p in PHASES}
+        self.phase_calls: Dict[str, int] = {p: 0 for p in PHASES}
+        self.steps = 0
+        self.episodes = 0
+        self.wall = 0.0          # seconds spent inside profiled train() calls
+        self.q_table = None      # agent's Q-table, sized on snapshot()
+        self.length_hist: List[int] = []
+        self._t_begin = None
+
+    def begin(self):
+        self._t_begin = time.perf_counter()
+
+    def end(self):
+        if self._t_begin is not None:
+            self.wall += time.perf_counter() - self._t_begin
+            self._t_begin = None
+
+    def add(self, phase: str, seconds: float, calls: int = 1):
+        self.phase_time[phase] += seconds
+        self.phase_calls[phase] += calls
+
+    def end_episode(self, length: int):
+        self.episodes += 1
+        self.steps += length
+        b = length.bit_length()
+        hist = self.length_hist
+        if b >= len(hist):
+            hist.extend([0] * (b + 1 - len(hist)))
+        hist[b] += 1
+
+    def elapsed(self) -> float:
+        """Tiempo de entrenamiento medido, incluido el de una llamada en curso."""
+        if self._t_begin is None:
+            return self.wall
+        return self.wall + time.perf_counter() - self._t_begin
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copia de todas las métricas como diccionario (apta para JSON)."""
+        wall = self.elapsed()
+        timed = sum(self.phase_time.values())
+        rate = 1.0 / wall if wall > 0 else 0.0
+        return {
+            "steps": self.steps,
+            "episodes": self.episodes,
+            "wall": wall,
+            "steps_per_sec": self.steps * rate,
+            "episodes_per_sec": self.episodes * rate,
+            "q_states": len(self.q_table) if self.q_table is not None else 0,
+            "phases": {
+                p: {
+                    "seconds": self.phase_time[p],
+                    "calls": self.phase_calls[p],
+                    "share": self.phase_time[p] / wall if wall > 0 else 0.0,
+                }
+                for p in PHASES
+            },
+            # Loop overhead, decay, LiveStats and callbacks
+            "other_seconds": max(0.0, wall - timed),
+            "length_hist": list(self.length_hist),
+        }
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+            f.write("\n")
+
+def format_report(snap: Dict[str, Any]) -> str:
+    """Resumen de texto de un snapshot(): reparto por fase e histograma de longitudes."""
+    lines = [f"profiled:        {snap['episodes']} episodes, {snap['steps']} steps in {snap['wall']:.2f}s"]
+    for p, ph in snap["phases"].items():
+        per_call = ph["seconds"] / ph["calls"] * 1e6 if ph["calls"] else 0.0
+        lines.append(f"  {p:12s} {ph['seconds']:8.3f}s {ph['share'] * 100:5.1f}%  {per_call:7.2f} us/call")
+    lines.append(f"  {'other':12s} {snap['other_seconds']:8.3f}s")
+    lines.append("episode lengths:")
+    for b, count in enumerate(snap["length_hist"]):
+        if count:
+            lo, hi = (0, 0) if b == 0 else (2 ** (b - 1), 2 ** b - 1)
+            lines.append(f"  {lo:>6}-{hi:<6} {count}")
+    return "\n".join(lines)
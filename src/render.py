@@ -1,20 +1,42 @@
+import numpy as np
 import pygame
 import sys
+import time
+from src.env import LaneEnv
+from src.stats import LiveStats
 from src.train import Trainer
+from src.worker import TrainingWorker
+from src.render_cache import FontCache, TextCache, SurfaceCache
 
-class GameUI:
-    def __init__(self, trainer: Trainer):
-        self.trainer = trainer
-        pygame.init()
-        self.width = 900
-        self.height = 600
-        self.screen = pygame.display.set_mode((self.width, self.height))
-        pygame.display.set_caption("AI Car Learning - Live Graphs")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("consolas", 18)
+# Chart views cycled with 'Z': whole history, then the last N episodes
+CHART_ZOOMS = (None, 10_000, 1_000, 300)
+
+# Auto-play runs a fixed-timestep simulation: SIM_RATE * speed env steps per second,
+# drawn at RENDER_FPS. Speeds are cycled with '+'/'-'; None runs as fast as the frame allows.
+RENDER_FPS = 60
+SIM_RATE = 15
+SIM_SPEEDS = (1, 2, 4, 16, 64, 256, 1024, 4096, None)
+# Share of a frame the simulation may use; a backlog beyond it is dropped instead of piling up
+SIM_FRAME_BUDGET = 0.6 / RENDER_FPS
+# Duration of the crash effect (15 frames at the old 15 fps); only shown while the
+# simulation is not faster than the display
+CRASH_SECONDS = 1.0
+
+class RoadPainter:
+    """
+    Dibujo de la escena (carretera, coche, obstáculos, choque) y de las
+    gráficas sobre cualquier Surface. No abre ventana: lo usan GameUI y el
+    render sin pantalla de src.offscreen.
+    """
 
-        # Config visual
-        self.lane_width = 80
+    def __init__(self, n_lanes: int, text: TextCache, width: int, height: int):
+        self.n_lanes = n_lanes
+        self.text = text
+        self.width = width
+        self.height = height
+
+        # Config visual: lanes shrink so the road fits left of the charts (400px)
+        self.lane_width = max(8, min(80, 320 // n_lanes))
         self.padding_left = 50
         self.road_height = 500
         
@@ -23,72 +45,59 @@ class GameUI:
         self.road_color = (40, 40, 45)
         self.car_color = (100, 200, 100)
         self.obs_color = (200, 80, 80)
-    
-    def _draw_line_chart(self, screen, x, y, w, h, values, color=(240,240,240), label=""):
+
+    def _build_background(self):
+        # Static layer: window background, road and lane dividers
+        bg = pygame.Surface((self.width, self.height))
+        bg.fill(self.bg_color)
+        mx = self.padding_left
+        my = 50
+        pygame.draw.rect(bg, self.road_color, (mx, my, self.n_lanes * self.lane_width, self.road_height))
+        for k in range(1, self.n_lanes):
+            x = mx + k * self.lane_width
+            pygame.draw.line(bg, (100,100,100), (x, my), (x, my + self.road_height), 2)
+        return bg
+
+    def _draw_line_chart(self, screen, x, y, w, h, lo, hi, color=(240,240,240), label=""):
+        # lo/hi: per-column min/max from LiveStats.series_envelope (one column per sample when zoomed in)
         pygame.draw.rect(screen, (28, 28, 34), (x, y, w, h), border_radius=8)
         pygame.draw.rect(screen, (80, 80, 90), (x, y, w, h), 1, border_radius=8)
 
-        if len(values) < 2:
+        if len(lo) < 2:
             return
 
-        vmin = min(values)
-        vmax = max(values)
+        # Range of the visible columns, so a zoomed chart uses the full height
+        vmin, vmax = float(lo.min()), float(hi.max())
         if vmax == vmin:
             vmax = vmin + 1e-6
 
-        # map a coords
-        pts = []
-        n = len(values)
-        # Use last w points or all if len < w (using w as logical window approx pixels width too?)
-        # User snippet said "values[-w:]", assuming user passes a slice or we slice here.
-        # But if W is width in pixels, maybe we want to fit more?
-        # Let's trust user logic: "for i, v in enumerate(values[-w:]):" where w was width passed to arg?
-        # No, in user snippet w was width of rect but slicing used `w` as count too?
-        # User code: "for i, v in enumerate(values[-w:]): ... int(i * (w-10)..."
-        # Wait, if `w` argument is pixel width (190), then `values[-w:]` takes last 190 points.
-        # That seems reasonable.
-        
-        limit_data = values[-int(w):] # Take at most `w` points to match pixels roughly
-        
-        for i, v in enumerate(limit_data): 
-            px = x + int(i * (w-10) / max(1, len(limit_data)-1)) + 5
-            py = y + h - int((v - vmin) * (h-10) / (vmax - vmin)) - 5
-            pts.append((px, py))
+        cols = len(lo)
+        xs = (x + 5 + np.arange(cols) * (w - 10) // (cols - 1)).tolist()
+        scale = (h - 10) / (vmax - vmin)
+        y_lo = (y + h - 5 - ((lo - vmin) * scale).astype(np.int64)).tolist()
+        y_hi = (y + h - 5 - ((hi - vmin) * scale).astype(np.int64)).tolist()
 
-        for i in range(1, len(pts)):
-            pygame.draw.line(screen, color, pts[i-1], pts[i], 2)
+        if y_lo == y_hi:
+            pygame.draw.lines(screen, color, False, list(zip(xs, y_lo)), 2)
+        else:
+            # Min/max band: exact extremes of every pixel column
+            upper = list(zip(xs, y_hi))
+            lower = list(zip(xs, y_lo))
+            lower.reverse()
+            pygame.draw.polygon(screen, color, upper + lower)
+            pygame.draw.lines(screen, color, False, upper, 1)
 
         if label:
-            small_font = pygame.font.SysFont("consolas", 14)
-            screen.blit(small_font.render(label, True, (220,220,220)), (x+8, y+6))
-            screen.blit(small_font.render(f"min={vmin:.1f} max={vmax:.1f}", True, (160,160,160)), (x+8, y+26))
-
-    def _draw_metrics(self, screen, x, y):
-        font = pygame.font.SysFont("consolas", 16)
-        big = pygame.font.SysFont("consolas", 20, bold=True)
-
-        s = self.trainer.stats
-        ep = len(s.distances)
-        crash_rate = s.crash_rate_recent() * 100
-
-        last_dist = s.distances[-1] if ep else 0
-        avg20 = s.moving_avg([float(d) for d in s.distances], w=20)
-        last_avg20 = avg20[-1] if avg20 else 0
-
-        screen.blit(big.render("Live Stats", True, (255,255,255)), (x, y))
-        y += 30
-        screen.blit(font.render(f"Episodios: {ep}", True, (230,230,230)), (x, y)); y += 22
-        screen.blit(font.render(f"Última distancia: {last_dist}", True, (230,230,230)), (x, y)); y += 22
-        screen.blit(font.render(f"Media móvil (20): {last_avg20:.1f}", True, (230,230,230)), (x, y)); y += 22
-        screen.blit(font.render(f"Crash rate (últ {s.window}): {crash_rate:.1f}%", True, (255,200,200)), (x, y)); y += 22
-        screen.blit(font.render(f"Epsilon: {self.trainer.agent.epsilon:.3f}", True, (200,200,255)), (x, y)); y += 22
+            screen.blit(self.text.render(label, (220,220,220), size=14), (x+8, y+6))
+            screen.blit(self.text.render(f"min={vmin:.1f} max={vmax:.1f}", (160,160,160), size=14), (x+8, y+26))
 
     def _draw_car(self, screen, lane):
+        # lane may be fractional while GameUI interpolates a lane change
         # Smaller car to ensure clear gaps
-        w = 40 # Was 60
+        w = self.lane_width // 2  # 40 with the default 80px lanes (was 60)
         h = 36 # Was 40
         # Center in lane
-        center_x = self.padding_left + lane * self.lane_width + (self.lane_width // 2)
+        center_x = self.padding_left + round(lane * self.lane_width) + (self.lane_width // 2)
         x = center_x - (w // 2)
         # Position at bottom
         y = 50 + self.road_height - 50
@@ -97,8 +106,9 @@ class GameUI:
         # windshield
         pygame.draw.rect(screen, (40, 60, 80), (x+5, y+5, w-10, 12), border_radius=3)
 
-    def _draw_obstacles(self, screen, obstacles):
-        # Logic: y=0 is AT CAR. y=1 is one step away.
+    def _draw_obstacles(self, screen, obstacles, offset=0.0):
+        # Logic: y=0 is AT CAR. y=1 is one step away. offset (0..1) draws them that
+        # far back towards their previous position (GameUI interpolation)
         # Car Top is roughly at: 50 + road_height - 50 = Bottom - 50.
         car_top = 50 + self.road_height - 50
         step_size = 50 
@@ -109,11 +119,11 @@ class GameUI:
             # visual_y is Top of obstacle? No, let's say Center.
             # Let's keep rect logic for position but draw circle.
             
-            visual_y = car_top - (ob.y * step_size)
+            visual_y = car_top - round((ob.y + offset) * step_size)
             
             # Draw as Circle! easier to see "misses"
             center_x = self.padding_left + lane * self.lane_width + (self.lane_width // 2)
-            radius = 16 # Diameter 32 (Lane is 80) -> HUGE GAP
+            radius = max(2, self.lane_width // 5)  # Diameter 32 when the lane is 80 -> HUGE GAP
             
             # Visual Y is the bottom edge? Or top?
             # Let's say visual_y is the BOTTOM of the shape (closest to car)
@@ -124,154 +134,389 @@ class GameUI:
             # Draw only if visible (roughly)
             if cy + radius > 50:
                  pygame.draw.circle(screen, self.obs_color, (center_x, cy), radius)
-                 pygame.draw.circle(screen, (150, 50, 50), (center_x, cy), radius-4)
+                 pygame.draw.circle(screen, (150, 50, 50), (center_x, cy), max(1, radius - 4))
+
+    def _draw_crash(self, screen, lane, progress):
+        # Draw explosion logic; progress goes from 0 (crash) to 1 (end of the effect)
+        grow = 15 * progress
+        # Get car pos
+        cx = self.padding_left + lane * self.lane_width + self.lane_width // 2
+        cy = 50 + self.road_height - 40 # approx car center
+        # Big red circle
+        pygame.draw.circle(screen, (255, 50, 50), (cx, cy), round(40 + grow * 2), 4)
+        pygame.draw.circle(screen, (255, 100, 0), (cx, cy), round(20 + grow), 0)
+
+        txt = self.text.render("CRASH!", (255, 255, 0), size=40, bold=True)
+        screen.blit(txt, (cx - 60, cy - 80))
+
+
+class GameUI(RoadPainter):
+    def __init__(self, trainer: Trainer):
+        self.trainer = trainer
+        pygame.init()
+        self.width = 900
+        self.height = 600
+        self.screen = pygame.display.set_mode((self.width, self.height))
+        pygame.display.set_caption("AI Car Learning - Live Graphs")
+        self.clock = pygame.time.Clock()
+        self.fonts = FontCache()
+        self.text = TextCache(self.fonts)
+        self.surfaces = SurfaceCache()
+        self.font = self.fonts.get("consolas", 18)
+
+        # Training runs in a background worker that owns trainer.env/agent/stats.
+        # The UI plays on its own env with the latest published agent snapshot
+        # and keeps its own stats, fed from the worker's episode deltas.
+        self.worker = TrainingWorker(trainer)
+        self.env = LaneEnv(horizon=trainer.env.horizon, spawn_prob=trainer.env.spawn_prob, seed=trainer.seed + 1,
+                           n_lanes=trainer.env.n_lanes, window=trainer.env.window)
+        prev = trainer.stats
+        self.stats = LiveStats.from_arrays(prev.distances, prev.rewards, prev.crashes, prev.epsilons,
+                                           window=prev.window, ma_window=prev.ma_window)
+
+        RoadPainter.__init__(self, self.env.n_lanes, self.text, self.width, self.height)
+
+        # Screen regions, redrawn and pushed to the display independently (dirty rects)
+        self.chart_x = 400
+        self.scene_rect = pygame.Rect(0, 0, self.chart_x - 10, self.height)
+        self.panel_rect = pygame.Rect(self.chart_x - 10, 0, self.width - self.chart_x + 10, 515)
+        self.progress_rect = pygame.Rect(self.chart_x - 10, 515, self.width - self.chart_x + 10, 45)
+        # Part of the status line right of the scene (the scene rect already covers the rest)
+        self.status_rect = pygame.Rect(self.chart_x - 10, 560, self.width - self.chart_x + 10, self.height - 560)
+        self.background = self._build_background()
+        self._reset_loop_state()
+
+    def _chart_surface(self, name, color, label, w=300, h=100):
+        # Re-rendered only when the series grows or the zoom changes
+        st = self.stats
+        last = CHART_ZOOMS[self.chart_zoom]
+        def build():
+            _, lo, hi = st.series_envelope(name, w - 10, last=last)
+            text = label if last is None else f"{label} (últimos {last})"
+            surf = pygame.Surface((w, h))
+            surf.fill(self.bg_color)
+            self._draw_line_chart(surf, 0, 0, w, h, lo, hi, color=color, label=text)
+            return surf
+        # All the series change together, once per episode
+        return self.surfaces.get(("chart", name), (len(st.distances), last), build)
+
+    def _draw_metrics(self, screen, x, y):
+        s = self.stats
+        ep = len(s.distances)
+        crash_rate = s.crash_rate_recent() * 100
+
+        last_dist = s.distances[-1] if ep else 0
+        last_avg20 = s.last_moving_avg()
+
+        screen.blit(self.text.render("Live Stats", (255,255,255), size=20, bold=True), (x, y))
+        y += 30
+        screen.blit(self.text.render(f"Episodios: {ep}", (230,230,230)), (x, y)); y += 22
+        screen.blit(self.text.render(f"Última distancia: {last_dist}", (230,230,230)), (x, y)); y += 22
+        screen.blit(self.text.render(f"Media móvil ({s.ma_window}): {last_avg20:.1f}", (230,230,230)), (x, y)); y += 22
+        screen.blit(self.text.render(f"Crash rate (últ {s.window}): {crash_rate:.1f}%", (255,200,200)), (x, y)); y += 22
+        screen.blit(self.text.render(f"Epsilon: {self.worker.latest().epsilon:.3f}", (200,200,255)), (x, y)); y += 22
+
+    def _metrics_surface(self, version, w=300, h=140):
+        def build():
+            surf = pygame.Surface((w, h))
+            surf.fill(self.bg_color)
+            self._draw_metrics(surf, 0, 0)
+            return surf
+        return self.surfaces.get("metrics", version, build)
+
+    def _draw_perf(self, screen, x, y, snap, w=180, h=300):
+        pygame.draw.rect(screen, (28, 28, 34), (x, y, w, h), border_radius=8)
+        pygame.draw.rect(screen, (80, 80, 90), (x, y, w, h), 1, border_radius=8)
+        x += 8
+        y += 6
+        screen.blit(self.text.render("Perf (train)", (255,255,255), size=16, bold=True), (x, y)); y += 22
+        if snap is None:
+            screen.blit(self.text.render("Press 'T' to profile", (160,160,160), size=14), (x, y))
+            return
+        screen.blit(self.text.render(f"steps/s {snap['steps_per_sec']:,.0f}", (230,230,230), size=14), (x, y)); y += 18
+        screen.blit(self.text.render(f"eps/s   {snap['episodes_per_sec']:,.1f}", (230,230,230), size=14), (x, y)); y += 18
+        screen.blit(self.text.render(f"Q states {snap['q_states']}", (230,230,230), size=14), (x, y)); y += 24
+
+        # Share of training time per phase
+        bar_w = w - 16
+        for name, ph in snap["phases"].items():
+            share = ph["share"]
+            screen.blit(self.text.render(f"{name:11s}{share * 100:5.1f}%", (200,200,220), size=14), (x, y)); y += 16
+            pygame.draw.rect(screen, (60, 60, 70), (x, y, bar_w, 4))
+            pygame.draw.rect(screen, (140, 180, 255), (x, y, int(bar_w * min(1.0, share)), 4))
+            y += 8
+
+        # Episode length histogram (power-of-2 buckets)
+        hist = snap["length_hist"]
+        y += 4
+        screen.blit(self.text.render("ep length (log2)", (200,200,220), size=14), (x, y)); y += 18
+        top = max(hist) if hist else 0
+        if top:
+            base = y + 40
+            col = max(1, bar_w // len(hist))
+            for b, count in enumerate(hist):
+                bh = int(40 * count / top)
+                pygame.draw.rect(screen, (255, 220, 140), (x + b * col, base - bh, max(1, col - 1), bh))
+
+    def _perf_surface(self, version, snap, w=180, h=300):
+        def build():
+            surf = pygame.Surface((w, h))
+            surf.fill(self.bg_color)
+            self._draw_perf(surf, 0, 0, snap, w, h)
+            return surf
+        return self.surfaces.get("perf", version, build)
+
+    def _draw_progress(self, screen, x, y, prog, w=300, h=14):
+        if not prog.running:
+            return
+        frac = prog.done / max(1, prog.total)
+        pygame.draw.rect(screen, (60, 60, 70), (x, y, w, h), border_radius=4)
+        pygame.draw.rect(screen, (120, 200, 120), (x, y, int(w * frac), h), border_radius=4)
+        label = f"Training {prog.done}/{prog.total}  {prog.episodes_per_sec:.0f} ep/s  {prog.steps_per_sec:.0f} steps/s"
+        screen.blit(self.text.render(label, (220,220,220), size=14), (x, y + h + 4))
+
+    def _reset_loop_state(self):
+        self.auto_play = False  # If True, play episodes visibly
+        self.show_perf = False  # Training profiler overlay ('O')
+        self.chart_zoom = 0  # Index into CHART_ZOOMS ('Z')
+        self.speed_idx = 0  # Index into SIM_SPEEDS ('+'/'-')
+
+        # Fixed-timestep auto-play: fraction of the next env step already elapsed,
+        # and the car lane before the last step (to interpolate lane changes)
+        self.sim_accum = 0.0
+        self.prev_lane = self.env.car_lane
 
-    def run(self):
-        running = True
-        auto_play = False  # If True, play episodes visibly
-        
         # For crash effect
-        crash_timer = 0
-        
+        self.crash_time = 0.0  # seconds of crash effect left
+
         # Accumulators for auto-play stats
-        current_ep_reward = 0.0
-        
-        while running:
-            self.screen.fill(self.bg_color)
-            
-            # Events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_t:
-                        # Train batch
-                        self.trainer.train(n_episodes=50) # Train 50 eps on keypress
-                    elif event.key == pygame.K_p:
-                        # Toggle auto play
-                        auto_play = not auto_play
-                        if auto_play:
-                            # Reset if needed or just continue
-                            if self.trainer.env.done:
-                                self.trainer.env.reset()
-                                current_ep_reward = 0.0
-                    elif event.key == pygame.K_r:
-                         # Reset env manually
-                         self.trainer.env.reset()
-                         current_ep_reward = 0.0
-
-            # Logic for Auto-Play (Visual Demo)
-            crashed_this_frame = False
-            if auto_play and crash_timer == 0:
-                # One step per frame
-                env = self.trainer.env
-                if env.done:
-                    # Save Stats for the finished episode!
-                    # Logic assumes we just finished in previous frame? 
-                    # Actually logic: step -> done=True. Next frame we enter here.
-                    # We should record it NOW before reset.
-                    # But wait, we need 'info' from the last step.
-                    # Easier: record right after step if done.
-                    
-                    # Reset
-                    env.reset()
-                    current_ep_reward = 0.0
-                
-                state = env.state()
-                action = self.trainer.agent.act(state, training=False) 
-                
-                s2, r, done, info = env.step(action)
-                current_ep_reward += r
-                
-                if done:
-                    # Record Stat
-                    self.trainer.stats.add_episode(
-                        distance=info["distance"],
-                        total_reward=current_ep_reward,
-                        crashed=info["crashed"],
-                        epsilon=self.trainer.agent.epsilon
-                    )
-
-                if info["crashed"]:
-                    crashed_this_frame = True
-                    crash_timer = 15 # Show crash for 15 frames
-
-            # Draw Road
-            mx = self.padding_left
-            my = 50
-            pygame.draw.rect(self.screen, self.road_color, (mx, my, 3 * self.lane_width, self.road_height))
-            
-            # Draw dividers
-            pygame.draw.line(self.screen, (100,100,100), (mx + self.lane_width, my), (mx + self.lane_width, my + self.road_height), 2)
-            pygame.draw.line(self.screen, (100,100,100), (mx + 2*self.lane_width, my), (mx + 2*self.lane_width, my + self.road_height), 2)
-            
-            # Draw Objects
-            self._draw_obstacles(self.screen, self.trainer.env.obstacles)
-            self._draw_car(self.screen, self.trainer.env.car_lane)
-            
-            # Visual Crash Effect
-            if crash_timer > 0:
-                crash_timer -= 1
-                # Draw explosion logic
-                # Get car pos
-                cx = self.padding_left + self.trainer.env.car_lane * self.lane_width + self.lane_width // 2
-                cy = 50 + self.road_height - 40 # approx car center
-                # Big red circle
-                pygame.draw.circle(self.screen, (255, 50, 50), (cx, cy), 40 + (15-crash_timer)*2, 4)
-                pygame.draw.circle(self.screen, (255, 100, 0), (cx, cy), 20 + (15-crash_timer), 0)
-                
-                f = pygame.font.SysFont("consolas", 40, bold=True)
-                txt = f.render("CRASH!", True, (255, 255, 0))
-                self.screen.blit(txt, (cx - 60, cy - 80))
-
-            # Draw Info Text
-            status = "PLAYING (Greedy)" if auto_play else "PAUSED"
-            txt = self.font.render(f"Press 'T' to train 50 episodes fast. 'P' to toggle Play/Pause. Status: {status}", True, (255,255,255))
-            self.screen.blit(txt, (mx, my + self.road_height + 20))
-
-            # Draw Current Distance on Top of Road
-            dist_txt = self.font.render(f"Distance: {self.trainer.env.step_count}", True, (255, 255, 255))
-            self.screen.blit(dist_txt, (mx + 10, my + 10))
-            
-            # === Gráficas en vivo (si hay stats) ===
-            st = self.trainer.stats
-            
-            # Panel derecho para charts
-            chart_x = 400
+        self.current_ep_reward = 0.0
+
+        # Last drawn state of the regions that are only redrawn on change
+        self._first_frame = True
+        self._last_panel = None
+        self._last_progress = None
+
+    def handle_event(self, event) -> bool:
+        """Procesa un evento de pygame; devuelve False si hay que cerrar la ventana."""
+        if event.type == pygame.QUIT:
+            return False
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_t:
+                # Train batch in the background worker
+                self.worker.request(50) # Train 50 eps on keypress
+            elif event.key == pygame.K_p:
+                # Toggle auto play
+                self.auto_play = not self.auto_play
+                self.sim_accum = 0.0
+                if self.auto_play:
+                    # Reset if needed or just continue
+                    if self.env.done:
+                        self.env.reset()
+                        self.current_ep_reward = 0.0
+                    self.prev_lane = self.env.car_lane
+            elif event.key == pygame.K_o:
+                # Toggle the profiler overlay (profiling starts with the next batch)
+                self.show_perf = not self.show_perf
+                self.worker.set_profiling(self.show_perf)
+            elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                self.speed_idx = min(self.speed_idx + 1, len(SIM_SPEEDS) - 1)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.speed_idx = max(self.speed_idx - 1, 0)
+            elif event.key == pygame.K_z:
+                # Cycle the charts between the whole history and the last N episodes
+                self.chart_zoom = (self.chart_zoom + 1) % len(CHART_ZOOMS)
+            elif event.key == pygame.K_r:
+                 # Reset env manually
+                 self.env.reset()
+                 self.current_ep_reward = 0.0
+                 self.prev_lane = self.env.car_lane
+                 self.sim_accum = 0.0
+        return True
+
+    def _slow_motion(self) -> bool:
+        # At most one env step per frame: interpolate and show the crash effect
+        speed = SIM_SPEEDS[self.speed_idx]
+        return speed is not None and speed * SIM_RATE <= RENDER_FPS
+
+    def _advance_sim(self, dt: float):
+        # Fixed timestep: dt seconds of wall time buy dt * SIM_RATE * speed env steps
+        speed = SIM_SPEEDS[self.speed_idx]
+        deadline = time.perf_counter() + SIM_FRAME_BUDGET
+        if speed is None:
+            self.sim_accum = 0.0
+            self._auto_play_steps(None, deadline)
+            return
+        self.sim_accum += dt * SIM_RATE * speed
+        n = int(self.sim_accum)
+        self.sim_accum -= n
+        if n and self._auto_play_steps(n, deadline) < n:
+            # Over the frame budget (or paused by a crash): drop the backlog instead of catching up
+            self.sim_accum = 0.0
+
+    def _auto_play_steps(self, n, deadline: float) -> int:
+        """
+        Juega hasta n pasos voraces (None = hasta deadline) y devuelve cuántos.
+        Cada episodio terminado se añade a self.stats en el momento; en cámara
+        lenta un choque detiene la simulación mientras dura su efecto.
+        """
+        env = self.env
+        # Greedy play on the latest snapshot; training keeps running meanwhile
+        snapshot = self.worker.latest()
+        act = snapshot.agent.act
+        stats = self.stats
+        clock = time.perf_counter
+        show_crash = self._slow_motion()
+        reward = self.current_ep_reward
+        state = env.state()
+        lane = env.car_lane
+        steps = 0
+
+        while n is None or steps < n:
+            # Checking the clock every step would cost more than the step itself
+            if steps & 63 == 63 and clock() >= deadline:
+                break
+            if env.done:
+                # The finished episode was recorded right after its last step
+                state = env.reset()
+                reward = 0.0
+            lane = env.car_lane
+            state, r, done, info = env.step(act(state, training=False))
+            reward += r
+            steps += 1
+
+            if done:
+                stats.add_episode(
+                    distance=info["distance"],
+                    total_reward=reward,
+                    crashed=info["crashed"],
+                    epsilon=snapshot.epsilon
+                )
+                if info["crashed"] and show_crash:
+                    self.crash_time = CRASH_SECONDS
+                    break
+
+        self.current_ep_reward = reward
+        self.prev_lane = lane
+        return steps
+
+    def frame(self, dt: float = 1.0 / RENDER_FPS):
+        """
+        Simula dt segundos y dibuja un frame (sin procesar eventos ni esperar al
+        reloj) y actualiza la pantalla; run() lo llama en bucle y los benchmarks lo cronometran.
+        """
+        if self._first_frame:
+            self.screen.blit(self.background, (0, 0))
+
+        # Logic for Auto-Play (Visual Demo)
+        if self.auto_play and self.crash_time <= 0:
+            self._advance_sim(dt)
+
+        # Scene: static road from the background layer, then moving objects
+        mx = self.padding_left
+        my = 50
+        self.screen.blit(self.background, self.scene_rect, self.scene_rect)
+        dirty = [self.scene_rect]
+
+        # Draw Objects; in slow motion, between the last two env steps
+        lane = self.env.car_lane
+        back = 0.0
+        if self.auto_play and self.crash_time <= 0 and self._slow_motion() and not self.env.done:
+            back = 1.0 - self.sim_accum
+            lane = lane - (lane - self.prev_lane) * back
+        self._draw_obstacles(self.screen, self.env.obstacles, offset=back)
+        self._draw_car(self.screen, lane)
+
+        # Visual Crash Effect
+        if self.crash_time > 0:
+            self.crash_time = max(0.0, self.crash_time - dt)
+            self._draw_crash(self.screen, self.env.car_lane, 1.0 - self.crash_time / CRASH_SECONDS)
+
+        # Draw Current Distance on Top of Road
+        dist_txt = self.text.render(f"Distance: {self.env.step_count}", (255, 255, 255), size=18)
+        self.screen.blit(dist_txt, (mx + 10, my + 10))
+
+        # Draw Info Text (it overlaps the scene, whose crash effect can reach it)
+        speed = SIM_SPEEDS[self.speed_idx]
+        speed_label = "max" if speed is None else f"x{speed}"
+        status = "PLAYING (Greedy)" if self.auto_play else "PAUSED"
+        self.screen.blit(self.background, self.status_rect, self.status_rect)
+        txt = self.text.render(f"'T' train 50 eps. 'P' Play/Pause. '+/-' speed: {speed_label}. Status: {status}", (255,255,255), size=18)
+        self.screen.blit(txt, (mx, my + self.road_height + 20))
+        dirty.append(self.status_rect)
+
+        # === Gráficas en vivo (si hay stats) ===
+        for d, r, c, e in self.worker.drain_episodes():
+            self.stats.add_episode(distance=d, total_reward=r, crashed=c, epsilon=e)
+        st = self.stats
+
+        # Panel derecho: metrics + charts, rebuilt only when the stats change
+        panel_version = (len(st.distances), self.worker.latest().version, self.show_perf, self.chart_zoom)
+        if panel_version != self._last_panel:
+            self._last_panel = panel_version
+            self.screen.blit(self.background, self.panel_rect, self.panel_rect)
+            chart_x = self.chart_x
             chart_y = 50
 
-            self._draw_metrics(self.screen, chart_x, chart_y)
+            self.screen.blit(self._metrics_surface(panel_version[:2]), (chart_x, chart_y))
+            if self.show_perf:
+                # Right of the Live Stats block and the charts
+                self.screen.blit(self._perf_surface(panel_version[1], self.worker.perf()), (chart_x + 310, chart_y))
             chart_y += 140
 
             # Distancia por episodio
-            self._draw_line_chart(
-                self.screen, chart_x, chart_y, 300, 100,
-                [float(d) for d in st.distances],
+            self.screen.blit(self._chart_surface(
+                "distances",
                 color=(180, 255, 180),
-                label="Distancia/episodio"
-            )
+                label="Distancia/episodio",
+            ), (chart_x, chart_y))
             chart_y += 110
 
             # Media móvil distancia
-            ma = st.moving_avg([float(d) for d in st.distances], w=20)
-            self._draw_line_chart(
-                self.screen, chart_x, chart_y, 300, 100,
-                ma,
+            self.screen.blit(self._chart_surface(
+                "distance_ma",
                 color=(255, 220, 140),
-                label="Media móvil (20)"
-            )
+                label=f"Media móvil ({st.ma_window})",
+            ), (chart_x, chart_y))
             chart_y += 110
 
             # Epsilon
-            self._draw_line_chart(
-                self.screen, chart_x, chart_y, 300, 100,
-                [float(e) for e in st.epsilons],
+            self.screen.blit(self._chart_surface(
+                "epsilons",
                 color=(180, 200, 255),
-                label="Epsilon"
-            )
+                label="Epsilon",
+            ), (chart_x, chart_y))
+            dirty.append(self.panel_rect)
 
+        # Background training progress / throughput
+        prog = self.worker.progress()
+        prog_key = (prog.running, prog.done, prog.total, int(prog.episodes_per_sec), int(prog.steps_per_sec))
+        if prog_key != self._last_progress:
+            self._last_progress = prog_key
+            self.screen.blit(self.background, self.progress_rect, self.progress_rect)
+            self._draw_progress(self.screen, self.chart_x, self.progress_rect.y + 5, prog)
+            dirty.append(self.progress_rect)
+
+        if self._first_frame:
+            self._first_frame = False
             pygame.display.flip()
-            self.clock.tick(15 if auto_play else 60) # Slow down if playing to see
+        else:
+            pygame.display.update(dirty)
+
+    def run(self):
+        self.worker.start()
+        self._reset_loop_state()
+        running = True
+
+        while running:
+            # Events
+            for event in pygame.event.get():
+                running = self.handle_event(event) and running
+
+            # Render at a fixed rate; auto-play speed only changes how many env steps each frame simulates
+            dt = self.clock.tick(RENDER_FPS) / 1000.0
+            self.frame(min(dt, 0.25))
 
+        self.worker.stop()
         pygame.quit()
         sys.exit()
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import pygame
+
+FontKey = Tuple[str, int, bool]
+
+class FontCache:
+    """pygame.font.SysFont memoizado: cada (nombre, tamaño, negrita) se carga una sola vez."""
+
+    def __init__(self):
+        self._fonts: Dict[FontKey, pygame.font.Font] = {}
+
+    def get(self, name: str = "consolas", size: int = 16, bold: bool = False) -> pygame.font.Font:
+        key = (name, size, bold)
+        font = self._fonts.get(key)
+        if font is None:
+            font = pygame.font.SysFont(name, size, bold=bold)
+            self._fonts[key] = font
+        return font
+
+
+class TextCache:
+    """Superficies de texto ya renderizadas (LRU acotado por max_entries)."""
+
+    def __init__(self, fonts: FontCache, max_entries: int = 512):
+        self.fonts = fonts
+        self.max_entries = max_entries
+        self._surfaces: "OrderedDict[Tuple[FontKey, str, Tuple[int, ...]], pygame.Surface]" = OrderedDict()
+
+    def render(self, text: str, color=(255, 255, 255), size: int = 16, bold: bool = False,
+               name: str = "consolas") -> pygame.Surface:
+        key = ((name, size, bold), text, tuple(color))
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            return surf
+        surf = self.fonts.get(name, size, bold).render(text, True, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surf
+
+
+class SurfaceCache:
+    """
+    Superficies versionadas: get() solo llama a build() cuando la versión
+    asociada a la clave cambia; si no, devuelve la superficie ya dibujada.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[Any, pygame.Surface]] = {}
+
+    def get(self, key: Hashable, version: Any, build: Callable[[], pygame.Surface]) -> pygame.Surface:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        surf = build()
+        self._entries[key] = (version, surf)
+        return surf
+
+    def invalidate(self, key: Hashable = None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
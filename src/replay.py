@@ -0,0 +1,155 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+class SumTree:
+    """
+    Árbol de sumas en un array plano: hojas en [leaves, leaves + capacity),
+    nodo n con hijos 2n y 2n+1, raíz en 1. Actualiza y muestrea lotes de
+    índices a la vez, nivel a nivel con NumPy.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.leaves = 1 << max(0, (capacity - 1).bit_length())
+        self.tree = np.zeros(2 * self.leaves, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def priorities(self, idx) -> np.ndarray:
+        return self.tree[self.leaves + np.asarray(idx, dtype=np.intp)]
+
+    def update(self, idx, priorities):
+        nodes = self.leaves + np.asarray(idx, dtype=np.intp)
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes >> 1)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes >> 1)
+
+    def sample(self, k: int, rng: np.random.Generator, size: int) -> np.ndarray:
+        """k índices con probabilidad proporcional a su prioridad (muestreo estratificado)."""
+        seg = self.total / k
+        u = (np.arange(k) + rng.random(k)) * seg
+        node = np.ones(k, dtype=np.intp)
+        tree = self.tree
+        while node[0] < self.leaves:
+            left = 2 * node
+            go_right = u >= tree[left]
+            u = np.where(go_right, u - tree[left], u)
+            node = left + go_right
+        # Float rounding can land past the last filled leaf
+        return np.minimum(node - self.leaves, size - 1)
+
+
+class ReplayBuffer:
+    """
+    Buffer circular de transiciones en arrays tipados, con muestreo uniforme
+    o priorizado (SumTree, prioridad (|TD| + eps)^alpha y pesos de importancia
+    (N * P)^-beta normalizados por el máximo).
+
+    observe() se llama tras cada paso del entorno: guarda la transición y,
+    según ratio (actualizaciones repetidas por paso), aplica agent.learn sobre
+    lotes de batch_size transiciones muestreadas.
+    """
+
+    def __init__(self, capacity: int = 50_000, ratio: float = 1.0, batch_size: int = 32,
+                 prioritized: bool = False, alpha: float = 0.6, beta: float = 0.4,
+                 eps: float = 1e-3, warmup: int = 1000, seed: int = 7):
+        self.capacity = capacity
+        self.ratio = ratio
+        self.batch_size = batch_size
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self.warmup = warmup
+        self.rng = np.random.default_rng(seed)
+
+        self.a = np.zeros(capacity, dtype=np.int8)
+        self.r = np.zeros(capacity, dtype=np.float32)
+        self.done = np.zeros(capacity, dtype=bool)
+        # States are allocated on the first add, once their length is known
+        self.s: Optional[np.ndarray] = None
+        self.s2: Optional[np.ndarray] = None
+        self.tree = SumTree(capacity) if prioritized else None
+        self.max_priority = 1.0
+        self._pending = []  # new slots whose max-priority leaf is set on the next sample
+
+        self.size = 0
+        self.pos = 0
+        self.replayed = 0
+        self._debt = 0.0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.a, self.r, self.done, self.s, self.s2]
+        total = sum(x.nbytes for x in arrays if x is not None)
+        return total + (self.tree.tree.nbytes if self.tree is not None else 0)
+
+    def add(self, s, a: int, r: float, s2, done: bool):
+        if self.s is None:
+            self.s = np.zeros((self.capacity, len(s)), dtype=np.int8)
+            self.s2 = np.zeros((self.capacity, len(s)), dtype=np.int8)
+        i = self.pos
+        self.s[i] = s
+        self.a[i] = a
+        self.r[i] = r
+        self.s2[i] = s2
+        self.done[i] = done
+        if self.tree is not None:
+            self._pending.append(i)
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(índices, pesos de importancia) de k transiciones."""
+        if self.tree is None:
+            return self.rng.integers(0, self.size, size=k), np.ones(k)
+        if self._pending:
+            # New transitions get the highest priority seen so they are replayed at least once
+            self.tree.update(self._pending, self.max_priority)
+            self._pending = []
+        idx = self.tree.sample(k, self.rng, self.size)
+        p = self.tree.priorities(idx) / self.tree.total
+        w = (self.size * p) ** -self.beta
+        return idx, w / w.max()
+
+    def update_priorities(self, idx, td):
+        prio = (np.abs(td) + self.eps) ** self.alpha
+        self.max_priority = max(self.max_priority, float(prio.max()))
+        self.tree.update(idx, prio)
+
+    def replay(self, agent, k: int):
+        """Aplica agent.learn a k transiciones muestreadas (y actualiza sus prioridades)."""
+        idx, w = self.sample(k)
+        s = self.s[idx].tolist()
+        s2 = self.s2[idx].tolist()
+        a = self.a[idx].tolist()
+        r = self.r[idx].tolist()
+        done = self.done[idx].tolist()
+        learn = agent.learn
+        td = [learn(tuple(s[n]), a[n], r[n], tuple(s2[n]), done[n], wn)
+              for n, wn in enumerate(w.tolist())]
+        if self.tree is not None:
+            self.update_priorities(idx, np.asarray(td, dtype=np.float64))
+        self.replayed += k
+
+    def observe(self, agent, s, a: int, r: float, s2, done: bool):
+        """Guarda una transición y hace las repeticiones que tocan según ratio."""
+        self.add(s, a, r, s2, done)
+        # A buffer smaller than warmup starts replaying once it is full
+        if self.size < min(self.warmup, self.capacity):
+            return
+        self._debt += self.ratio
+        if self._debt >= self.batch_size:
+            k = int(self._debt)
+            self._debt -= k
+            self.replay(agent, k)
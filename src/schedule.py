@@ -0,0 +1,123 @@
+import math
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional
+
+from src.train import Trainer
+
+# Why run_budgeted stopped
+STOP_REASONS = ("max_episodes", "step_budget", "time_budget", "target_reached", "plateau", "callback")
+
+@dataclass
+class TrainingBudget:
+    """
+    Límites de una ejecución de run_budgeted (None = sin límite).
+
+    max_steps_per_episode trunca episodios largos (no cuenta como choque).
+    target_avg / max_crash_rate: para cuando la media móvil de LiveStats llega
+    a target_avg y la tasa de choques reciente no supera max_crash_rate.
+    patience: para si la mejor media móvil no sube más de min_delta en
+    patience episodios. Ninguna regla de parada temprana se aplica antes de
+    min_episodes episodios.
+    """
+    max_episodes: Optional[int] = None
+    max_steps_per_episode: Optional[int] = None
+    max_total_steps: Optional[int] = None
+    max_seconds: Optional[float] = None
+    target_avg: Optional[float] = None
+    max_crash_rate: Optional[float] = None
+    patience: Optional[int] = None
+    min_delta: float = 0.0
+    min_episodes: int = 0
+    keep_every: int = 50
+
+@dataclass
+class TrainingReport:
+    stop_reason: str
+    episodes: int
+    steps: int
+    truncated: int
+    elapsed: float
+    final_avg: float
+    final_crash_rate: float
+    best_avg: float
+    epsilon: float
+    budget: TrainingBudget
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def format(self) -> str:
+        return "\n".join([
+            f"stop reason:     {self.stop_reason}",
+            f"episodes:        {self.episodes} ({self.truncated} truncated)",
+            f"steps:           {self.steps}",
+            f"elapsed:         {self.elapsed:.2f}s",
+            f"final avg:       {self.final_avg:.1f} (best {self.best_avg:.1f})",
+            f"crash rate:      {self.final_crash_rate * 100:.1f}%",
+            f"epsilon:         {self.epsilon:.3f}",
+        ])
+
+def run_budgeted(trainer: Trainer, budget: TrainingBudget,
+                 callback: Optional[Callable[[int, int], bool]] = None) -> TrainingReport:
+    """
+    Ejecuta trainer.train dentro de los límites de budget y devuelve qué se
+    hizo y por qué paró. callback se llama tras cada episodio como en
+    Trainer.train; si devuelve False, la parada se reporta como "callback".
+    """
+    st = trainer.stats
+    eps0, steps0, trunc0 = len(st.distances), st.distance_sum, trainer.truncations
+    t0 = time.perf_counter()
+    deadline = None if budget.max_seconds is None else t0 + budget.max_seconds
+
+    reason = None
+    best = -math.inf
+    best_at = 0  # episodes run when best last improved by more than min_delta
+
+    def check(done: int, total: int) -> bool:
+        nonlocal reason, best, best_at
+        if callback is not None and callback(done, total) is False:
+            reason = "callback"
+            return False
+        if deadline is not None and time.perf_counter() >= deadline:
+            reason = "time_budget"
+            return False
+
+        if done < max(budget.min_episodes, 1):
+            return True
+        avg = st.last_moving_avg()
+        if avg > best + budget.min_delta:
+            best_at = done
+        best = max(best, avg)
+        if budget.target_avg is not None and avg >= budget.target_avg:
+            if budget.max_crash_rate is None or st.crash_rate_recent() <= budget.max_crash_rate:
+                reason = "target_reached"
+                return False
+        if budget.patience is not None and done - best_at >= budget.patience:
+            reason = "plateau"
+            return False
+        return True
+
+    n = budget.max_episodes if budget.max_episodes is not None else 2**62
+    trainer.train(n_episodes=n, keep_every=budget.keep_every, callback=check,
+                  max_steps=budget.max_steps_per_episode, step_budget=budget.max_total_steps)
+
+    steps = st.distance_sum - steps0
+    if reason is None:
+        if budget.max_total_steps is not None and steps >= budget.max_total_steps:
+            reason = "step_budget"
+        else:
+            reason = "max_episodes"
+
+    return TrainingReport(
+        stop_reason=reason,
+        episodes=len(st.distances) - eps0,
+        steps=steps,
+        truncated=trainer.truncations - trunc0,
+        elapsed=time.perf_counter() - t0,
+        final_avg=st.last_moving_avg(),
+        final_crash_rate=st.crash_rate_recent(),
+        best_avg=best if best > -math.inf else st.last_moving_avg(),
+        epsilon=trainer.agent.epsilon,
+        budget=budget,
+    )
@@ -0,0 +1,150 @@
+from array import array
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+class MinMaxPyramid:
+    """
+    Serie con una pirámide de mínimos/máximos para dibujarla decimada.
+
+    El nivel 0 son los valores (float32); el nivel k guarda el mínimo y el
+    máximo de cada bloque de 2**k valores consecutivos (el último puede estar
+    incompleto) y el nivel superior tiene un único bloque.
+
+    append() solo añade al nivel 0; los niveles superiores se ponen al día
+    en la siguiente consulta, tocando solo los bloques del final que han
+    cambiado (valor a valor si son pocos, con NumPy si son muchos).
+
+    envelope() devuelve el mínimo y el máximo exactos de cada columna de
+    píxeles de un rango, combinando O(log(valores por columna)) bloques por
+    columna: el coste no depende de la longitud total de la serie.
+    """
+
+    # Pending values above this are folded into the pyramid with NumPy
+    BULK_SYNC = 256
+
+    def __init__(self, values: Sequence[float] = ()):
+        self.clear()
+        values = np.asarray(values, dtype=np.float32)
+        if values.size:
+            self._mins[0].frombytes(values.tobytes())
+
+    def clear(self):
+        level0 = array("f")
+        # Level 0 is both the min and the max of its one-value blocks
+        self._mins: List[array] = [level0]
+        self._maxs: List[array] = [level0]
+        self._built = 0  # values already folded into the upper levels
+
+    def __len__(self) -> int:
+        return len(self._mins[0])
+
+    def append(self, v: float):
+        self._mins[0].append(v)
+
+    def _sync(self):
+        n = len(self._mins[0])
+        if self._built == n:
+            return
+        if n - self._built > self.BULK_SYNC:
+            self._sync_bulk()
+        else:
+            level0 = self._mins[0]
+            for i in range(self._built, n):
+                self._push(i, level0[i])
+        self._built = n
+
+    def _push(self, i: int, v: float):
+        # Fold value i (already in level 0) into the levels above
+        mins, maxs = self._mins, self._maxs
+        top = len(mins)
+        k = 1
+        # An even index starts a new block one level up
+        while k < top and not i & 1:
+            mins[k].append(v)
+            maxs[k].append(v)
+            i >>= 1
+            k += 1
+        while k < top:
+            i >>= 1
+            lo = mins[k]
+            if v < lo[i]:
+                lo[i] = v
+            else:
+                hi = maxs[k]
+                if v > hi[i]:
+                    hi[i] = v
+                else:
+                    # Blocks above contain this one, so they already cover v
+                    return
+            k += 1
+        if i == 1:
+            # The top level now has two blocks: add a level above (level 0 may hold unsynced values)
+            mins.append(array("f", [min(mins[-1][:2])]))
+            maxs.append(array("f", [max(maxs[-1][:2])]))
+
+    def _sync_bulk(self):
+        # Recompute, level by level, the blocks from the first one holding a new value
+        mins, maxs = self._mins, self._maxs
+        built = self._built
+        child_min = child_max = np.frombuffer(mins[0], dtype=np.float32)
+        k = 1
+        while len(child_min) > 1:
+            first = built >> k
+            starts = np.arange(2 * first, len(child_min), 2)
+            new_min = np.minimum.reduceat(child_min, starts)
+            new_max = np.maximum.reduceat(child_max, starts)
+            if k == len(mins):
+                mins.append(array("f"))
+                maxs.append(array("f"))
+            lo, hi = mins[k], maxs[k]
+            del lo[first:], hi[first:]
+            lo.frombytes(new_min.tobytes())
+            hi.frombytes(new_max.tobytes())
+            child_min = np.frombuffer(lo, dtype=np.float32)
+            child_max = np.frombuffer(hi, dtype=np.float32)
+            k += 1
+
+    def envelope(self, start: int = 0, stop: Optional[int] = None,
+                 columns: int = 300) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (mínimos, máximos) de los valores [start, stop) repartidos en
+        min(columns, stop - start) columnas; la columna c cubre los índices
+        start + floor(c * n / cols) .. start + floor((c + 1) * n / cols) - 1.
+        """
+        self._sync()
+        n = len(self)
+        stop = n if stop is None else min(stop, n)
+        start = max(0, start)
+        span = stop - start
+        cols = min(columns, span)
+        if cols <= 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32)
+
+        bounds = start + (np.arange(cols + 1, dtype=np.int64) * span) // cols
+        left = bounds[:-1].copy()
+        right = bounds[1:].copy()
+        lo = np.full(cols, np.inf, dtype=np.float32)
+        hi = np.full(cols, -np.inf, dtype=np.float32)
+
+        # Bottom-up range query (as in an iterative segment tree), all columns at once
+        for level_min, level_max in zip(self._mins, self._maxs):
+            active = left < right
+            if not active.any():
+                break
+            mins = np.frombuffer(level_min, dtype=np.float32)
+            maxs = np.frombuffer(level_max, dtype=np.float32)
+            take = active & (left & 1 == 1)
+            idx = left[take]
+            lo[take] = np.minimum(lo[take], mins[idx])
+            hi[take] = np.maximum(hi[take], maxs[idx])
+            left += take
+            take = active & (right & 1 == 1)
+            idx = right[take] - 1
+            lo[take] = np.minimum(lo[take], mins[idx])
+            hi[take] = np.maximum(hi[take], maxs[idx])
+            left >>= 1
+            right >>= 1
+            # Free the buffer exports so the arrays can keep growing
+            del mins, maxs
+        return lo, hi
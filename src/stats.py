@@ -1,5 +1,12 @@
+import math
 from dataclasses import dataclass, field
 from collections import deque
+from typing import Optional
+
+from src.series import MinMaxPyramid
+
+# Series with a min/max pyramid for the charts (see series_envelope)
+CHART_SERIES = ("distances", "distance_ma", "rewards", "epsilons")
 
 @dataclass
 class LiveStats:
@@ -11,12 +18,111 @@ class LiveStats:
     window: int = 30
     _recent_crashes: deque = field(default_factory=lambda: deque(maxlen=30))
 
+    # Incrementally maintained aggregates (updated in add_episode, O(1) per episode)
+    ma_window: int = 20
+    distance_sum: int = 0  # total steps over all episodes
+    distance_ma: list[float] = field(default_factory=list)  # == moving_avg(distances, ma_window)
+    _ma_recent: deque = field(default_factory=deque, repr=False)
+    _ma_sum: float = field(default=0.0, repr=False)
+    _recent_crash_sum: int = field(default=0, repr=False)
+    _ranges: dict = field(default_factory=dict, repr=False)  # series name -> [min, max]
+    _pyramids: dict = field(default_factory=dict, repr=False, compare=False)  # series name -> MinMaxPyramid
+
+    def __post_init__(self):
+        if self._recent_crashes.maxlen != self.window:
+            self._recent_crashes = deque(self._recent_crashes, maxlen=self.window)
+        self._recent_crash_sum = sum(self._recent_crashes)
+        for name in CHART_SERIES:
+            if name not in self._pyramids:
+                self._pyramids[name] = MinMaxPyramid(getattr(self, name))
+
+    def _track_range(self, name: str, v: float):
+        r = self._ranges.get(name)
+        if r is None:
+            self._ranges[name] = [v, v]
+        elif v < r[0]:
+            r[0] = v
+        elif v > r[1]:
+            r[1] = v
+
     def add_episode(self, distance: int, total_reward: float, crashed: bool, epsilon: float):
         self.distances.append(distance)
         self.rewards.append(total_reward)
         self.crashes.append(1 if crashed else 0)
         self.epsilons.append(epsilon)
-        self._recent_crashes.append(1 if crashed else 0)
+        pyramids = self._pyramids
+        pyramids["distances"].append(distance)
+        pyramids["rewards"].append(total_reward)
+        pyramids["epsilons"].append(epsilon)
+
+        self.distance_sum += distance
+
+        c = 1 if crashed else 0
+        if len(self._recent_crashes) == self._recent_crashes.maxlen:
+            self._recent_crash_sum -= self._recent_crashes[0]
+        self._recent_crashes.append(c)
+        self._recent_crash_sum += c
+
+        # Same values as moving_avg(distances, ma_window): while there are fewer
+        # than ma_window episodes the series is a single mean over all of them
+        self._ma_recent.append(distance)
+        self._ma_sum += distance
+        if len(self._ma_recent) > self.ma_window:
+            self._ma_sum -= self._ma_recent.popleft()
+        n = len(self.distances)
+        if n >= 2:
+            avg = self._ma_sum / len(self._ma_recent)
+            if n <= self.ma_window:
+                self.distance_ma[:] = [avg]
+                self._ranges["distance_ma"] = [avg, avg]
+                pyramids["distance_ma"].clear()
+            else:
+                self.distance_ma.append(avg)
+                self._track_range("distance_ma", avg)
+            pyramids["distance_ma"].append(avg)
+
+        self._track_range("distances", float(distance))
+        self._track_range("rewards", float(total_reward))
+        self._track_range("epsilons", float(epsilon))
+
+    @classmethod
+    def from_arrays(cls, distances, rewards, crashes, epsilons, window: int = 30, ma_window: int = 20) -> "LiveStats":
+        """
+        LiveStats con las series dadas y los mismos agregados que tras llamar
+        add_episode por cada episodio, calculados con NumPy (sin recorrerlas).
+        """
+        import numpy as np
+
+        d = np.asarray(distances, dtype=np.int64)
+        c = np.asarray(crashes, dtype=np.int64)
+        r = np.asarray(rewards, dtype=np.float64)
+        e = np.asarray(epsilons, dtype=np.float64)
+        pyramids = {"distances": MinMaxPyramid(d), "rewards": MinMaxPyramid(r), "epsilons": MinMaxPyramid(e)}
+        st = cls(distances=d.tolist(), rewards=r.tolist(), crashes=c.tolist(), epsilons=e.tolist(),
+                 window=window, _recent_crashes=deque(c[-window:].tolist() if window else [], maxlen=window),
+                 ma_window=ma_window, _pyramids=pyramids)
+        n = len(d)
+        if n == 0:
+            return st
+
+        st.distance_sum = int(d.sum())
+        recent = d[-ma_window:]
+        st._ma_recent = deque(recent.tolist())
+        st._ma_sum = float(recent.sum())
+        if n >= 2:
+            if n <= ma_window:
+                ma = [st._ma_sum / n]
+            else:
+                csum = np.concatenate(([0], np.cumsum(d)))
+                ma = ((csum[ma_window:] - csum[:-ma_window]) / ma_window).tolist()
+            st.distance_ma = ma
+            st._ranges["distance_ma"] = [min(ma), max(ma)]
+            st._pyramids["distance_ma"] = MinMaxPyramid(ma)
+
+        for name in ("distances", "rewards", "epsilons"):
+            values = getattr(st, name)
+            st._ranges[name] = [float(min(values)), float(max(values))]
+        return st
 
     def moving_avg(self, series: list[float], w: int = 20):
         if len(series) < 2:
@@ -32,7 +138,30 @@ class LiveStats:
                 out.append(s / w)
         return out
 
+    def last_moving_avg(self) -> float:
+        """Último valor de la media móvil de distancias (0 si aún no hay)."""
+        return self.distance_ma[-1] if self.distance_ma else 0.0
+
+    def series_range(self, name: str):
+        """(min, max) acumulados de una serie ("distances", "distance_ma", "rewards", "epsilons")."""
+        r = self._ranges.get(name)
+        if r is None:
+            return (math.nan, math.nan)
+        return (r[0], r[1])
+
+    def series_envelope(self, name: str, columns: int, last: Optional[int] = None):
+        """
+        (inicio, mínimos, máximos) para dibujar la serie `name` (ver CHART_SERIES)
+        en `columns` columnas: toda la historia o solo los últimos `last` valores.
+        Cada columna tiene el mínimo y el máximo exactos de los valores que cubre.
+        """
+        pyramid = self._pyramids[name]
+        n = len(pyramid)
+        start = 0 if last is None else max(0, n - last)
+        lo, hi = pyramid.envelope(start, n, columns)
+        return start, lo, hi
+
     def crash_rate_recent(self):
         if not self._recent_crashes:
             return 0.0
-        return sum(self._recent_crashes) / len(self._recent_crashes)
+        return self._recent_crash_sum / len(self._recent_crashes)
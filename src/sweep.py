@@ -0,0 +1,174 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.train import Trainer
+
+# Trainer.__init__ arguments sampled as integers
+INT_PARAMS = ("seed", "horizon")
+
+Config = Dict[str, Any]
+
+def grid_space(space: Dict[str, List[Any]]) -> List[Config]:
+    """Producto cartesiano de los valores de cada parámetro."""
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+def random_space(space: Dict[str, List[Any]], n_samples: int, seed: int = 0) -> List[Config]:
+    """
+    Muestreo aleatorio: un parámetro con un solo valor queda fijo; con varios
+    se muestrea uniforme entre su mínimo y su máximo (enteros para seed/horizon).
+    """
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(n_samples):
+        cfg = {}
+        for name in sorted(space):
+            values = space[name]
+            lo, hi = min(values), max(values)
+            if lo == hi:
+                cfg[name] = lo
+            elif name in INT_PARAMS:
+                cfg[name] = rng.randint(lo, hi)
+            else:
+                cfg[name] = rng.uniform(lo, hi)
+        configs.append(cfg)
+    return configs
+
+def config_key(config: Config) -> str:
+    return json.dumps(config, sort_keys=True)
+
+def run_config(config: Config, episodes: int, threshold: float) -> Dict[str, Any]:
+    """Entrena un Trainer con la configuración dada y devuelve métricas compactas."""
+    t0 = time.perf_counter()
+    trainer = Trainer(**config)
+    # Only the first and last episodes are recorded; the sweep only needs stats
+    trainer.train(n_episodes=episodes, keep_every=max(1, episodes))
+    st = trainer.stats
+
+    ma = st.distance_ma
+    w = st.ma_window
+    reached = next((i for i, v in enumerate(ma) if v >= threshold), None)
+    return {
+        "config": config,
+        "episodes": episodes,
+        "threshold": threshold,
+        "final_avg": ma[-1] if ma else 0.0,
+        "crash_rate": st.crash_rate_recent(),
+        # Moving average index i covers episodes i .. i+w-1
+        "episodes_to_threshold": None if reached is None else reached + min(w, len(st.distances)),
+        "steps": st.distance_sum,
+        "elapsed": time.perf_counter() - t0,
+    }
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    """Lee los resultados ya guardados (una línea JSON por configuración)."""
+    if not os.path.exists(path):
+        return []
+    results = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Last line of a killed sweep may be truncated
+                continue
+    return results
+
+def rank(results: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Mejor primero: mayor media móvil final, luego menor tasa de choques."""
+    return sorted(results, key=lambda r: (-r["final_avg"], r["crash_rate"]))
+
+def run_sweep(configs: List[Config], episodes: int, threshold: float, out_path: str,
+              workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Ejecuta las configuraciones en un pool de procesos, añadiendo cada resultado
+    a out_path en cuanto termina. Las configuraciones ya presentes en out_path
+    se saltan, así que un barrido interrumpido se reanuda relanzándolo.
+    """
+    # Results from runs with a different budget or threshold are not comparable
+    results = [r for r in load_results(out_path)
+               if r.get("episodes") == episodes and r.get("threshold") == threshold]
+    done = {config_key(r["config"]) for r in results}
+    pending = [c for c in configs if config_key(c) not in done]
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool, open(out_path, "a+", encoding="utf-8") as out:
+            # Terminate a truncated last line so new results start on their own line
+            if out.tell() > 0:
+                out.seek(out.tell() - 1)
+                if out.read(1) != "\n":
+                    out.write("\n")
+            futures = [pool.submit(run_config, c, episodes, threshold) for c in pending]
+            for fut in as_completed(futures):
+                res = fut.result()
+                out.write(json.dumps(res) + "\n")
+                out.flush()
+                results.append(res)
+
+    wanted = {config_key(c) for c in configs}
+    return rank(r for r in results if config_key(r["config"]) in wanted)
+
+def format_table(results: List[Dict[str, Any]], top: Optional[int] = None) -> str:
+    rows = results[:top] if top else results
+    names = sorted({k for r in rows for k in r["config"]})
+    header = ["#"] + names + ["final_avg", "crash%", "eps_to_thr"]
+    lines = [header]
+    for i, r in enumerate(rows, 1):
+        cfg = r["config"]
+        cells = [str(i)]
+        cells += [f"{cfg[n]:.4g}" if isinstance(cfg.get(n), float) else str(cfg.get(n, "")) for n in names]
+        thr = r["episodes_to_threshold"]
+        cells += [f"{r['final_avg']:.1f}", f"{r['crash_rate'] * 100:.1f}", "-" if thr is None else str(thr)]
+        lines.append(cells)
+    widths = [max(len(row[c]) for row in lines) for c in range(len(header))]
+    return "\n".join("  ".join(cell.rjust(wd) for cell, wd in zip(row, widths)) for row in lines)
+
+def main(argv=None):
+    """Barrido de hiperparámetros: python -m src.sweep --alpha 0.1 0.2 --seed 1 2 3"""
+    parser = argparse.ArgumentParser(description="Process-pool hyperparameter sweep for Trainer")
+    parser.add_argument("--alpha", type=float, nargs="+", default=[0.20])
+    parser.add_argument("--gamma", type=float, nargs="+", default=[0.95])
+    parser.add_argument("--epsilon-decay", type=float, nargs="+", default=[0.990])
+    parser.add_argument("--spawn-prob", type=float, nargs="+", default=[0.35])
+    parser.add_argument("--horizon", type=int, nargs="+", default=[12])
+    parser.add_argument("--seed", type=int, nargs="+", default=[7])
+    parser.add_argument("--random", type=int, default=0, metavar="N",
+                        help="sample N random configs between each parameter's min and max instead of a grid")
+    parser.add_argument("--sample-seed", type=int, default=0)
+    parser.add_argument("--episodes", type=int, default=500)
+    parser.add_argument("--threshold", type=float, default=200.0,
+                        help="moving-average distance used for episodes_to_threshold")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="sweep_results.jsonl")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    space = {
+        "alpha": args.alpha,
+        "gamma": args.gamma,
+        "epsilon_decay": args.epsilon_decay,
+        "spawn_prob": args.spawn_prob,
+        "horizon": args.horizon,
+        "seed": args.seed,
+    }
+    if args.random:
+        configs = random_space(space, args.random, seed=args.sample_seed)
+    else:
+        configs = grid_space(space)
+
+    t0 = time.perf_counter()
+    results = run_sweep(configs, args.episodes, args.threshold, args.out, workers=args.workers)
+    print(format_table(results, top=args.top))
+    print(f"\n{len(results)} configs in {time.perf_counter() - t0:.1f}s -> {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+class WatkinsTraces:
+    """
+    Q(λ) de Watkins con trazas de elegibilidad dispersas, para Trainer.train.
+
+    Solo se guardan los pares (estado, acción) visitados recientemente, en
+    orden de visita, junto a la fila Q del agente y el paso de su última
+    visita. Las trazas son de reemplazo: valen (gamma * lam) ** edad, así que
+    la más antigua es siempre la menor. Se descartan al bajar de cutoff y
+    nunca hay más de max_traces, de modo que cada learn() cuesta
+    O(min(max_traces, log(cutoff) / log(gamma * lam))).
+
+    Las trazas se borran al empezar cada episodio (reset), al llegar a un
+    estado terminal y cuando la acción aprendida no es voraz según la tabla
+    actual (exploración): a partir de ahí el retorno ya no sigue la política
+    voraz que estiman las trazas anteriores. Con lam=0 equivale a learn().
+
+    Funciona con cualquier agente cuyo get_q devuelva la fila mutable del
+    estado (dict, dense y hashed).
+    """
+
+    def __init__(self, lam: float = 0.8, cutoff: float = 0.01, max_traces: int = 64):
+        if not 0.0 <= lam <= 1.0:
+            raise ValueError("lam must be in [0, 1]")
+        if max_traces < 1:
+            raise ValueError("max_traces must be >= 1")
+        self.lam = lam
+        self.cutoff = cutoff
+        self.max_traces = max_traces
+        # (state, action) -> [Q row, step of the last visit], oldest first
+        self._traces: "OrderedDict[Tuple[tuple, int], list]" = OrderedDict()
+        self._t = 0
+        self._gamma: Optional[float] = None
+        self._decay: List[float] = []
+        self.cuts = 0  # times an exploratory action cleared the traces
+
+    def __len__(self) -> int:
+        return len(self._traces)
+
+    def reset(self):
+        """Borra las trazas (inicio de episodio)."""
+        self._traces.clear()
+
+    def _build_decay(self, gamma: float):
+        # decay[k]: trace of a pair visited k steps ago; its length is the live trace limit
+        gl = gamma * self.lam
+        decay = [1.0]
+        while len(decay) < self.max_traces and decay[-1] * gl >= self.cutoff:
+            decay.append(decay[-1] * gl)
+        self._decay = decay
+        self._gamma = gamma
+
+    def learn(self, agent, s, a: int, r: float, s2, done: bool) -> float:
+        """Actualiza todos los pares con traza con el error TD de esta transición; lo devuelve."""
+        if agent.gamma != self._gamma:
+            self._build_decay(agent.gamma)
+        decay = self._decay
+        traces = self._traces
+
+        row = agent.get_q(s)
+        if traces and row[a] != max(row):
+            traces.clear()
+            self.cuts += 1
+
+        t = self._t = self._t + 1
+        key = (s, a)
+        entry = traces.get(key)
+        if entry is None:
+            traces[key] = [row, t]
+        else:
+            # The hashed agent may have evicted and re-created the row since the last visit
+            entry[0] = row
+            entry[1] = t
+            traces.move_to_end(key)
+        # Each step refreshes one pair, so dropping the expired ones keeps len <= len(decay)
+        oldest = t - len(decay) + 1
+        while next(iter(traces.values()))[1] < oldest:
+            traces.popitem(last=False)
+
+        if done:
+            target = r
+        else:
+            target = r + agent.gamma * max(agent.get_q(s2))
+        td = target - row[a]
+        step = agent.alpha * td
+        for (_, act), (q, seen) in traces.items():
+            q[act] += step * decay[t - seen]
+
+        if done:
+            traces.clear()
+        return td
@@ -1,66 +1,393 @@
-from dataclasses import dataclass
-from typing import List, Dict, Any
+import argparse
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import List, Dict, Any, Callable, Optional
+import numpy as np
 from src.env import LaneEnv
-from src.agent import QLearningAgent
+from src.vec_env import VecLaneEnv
+from src.agent import QLearningAgent, DenseQLearningAgent, HashedQLearningAgent
 from src.stats import LiveStats
+from src.trajectory import Trajectory, TrajectoryRecorder, EpisodeArchive
+from src.profiling import Profiler, format_report
+from src.replay import ReplayBuffer
+from src.traces import WatkinsTraces
 
 @dataclass
 class EpisodeRecord:
-    steps: List[Dict[str, Any]]
     total_reward: float
     distance: int
+    # Episodes kept in memory carry their arrays; archived ones only their index,
+    # so that a long run does not hold a view (and an open mapping) per record
+    data: Optional[Trajectory] = field(default=None, repr=False)
+    archive: Optional[EpisodeArchive] = field(default=None, repr=False)
+    index: int = -1
+
+    @property
+    def trajectory(self) -> Trajectory:
+        if self.data is not None:
+            return self.data
+        return self.archive.trajectory(self.index)
+
+    @property
+    def steps(self) -> List[Dict[str, Any]]:
+        # Materialized on demand; the record itself only keeps the columnar arrays
+        return self.trajectory.steps()
+
+AGENT_BACKENDS = {
+    "dict": QLearningAgent,
+    "dense": DenseQLearningAgent,
+    "hashed": HashedQLearningAgent,
+}
 
 class Trainer:
-    def __init__(self):
-        self.env = LaneEnv(horizon=12, spawn_prob=0.35, seed=7)
-        self.agent = QLearningAgent(alpha=0.20, gamma=0.95, epsilon_decay=0.990, seed=7)
+    def __init__(self, horizon: int = 12, spawn_prob: float = 0.35, seed: int = 7,
+                 alpha: float = 0.20, gamma: float = 0.95, epsilon_decay: float = 0.990,
+                 agent_backend: str = "dict", archive_path: Optional[str] = None,
+                 profile: bool = False, replay: Optional[ReplayBuffer] = None,
+                 n_lanes: int = 3, window: Optional[int] = None, max_states: Optional[int] = None,
+                 traces: Optional[WatkinsTraces] = None):
+        self.seed = seed
+        self.env = LaneEnv(horizon=horizon, spawn_prob=spawn_prob, seed=seed, n_lanes=n_lanes, window=window)
+        # Backend-specific sizing: the dense table follows the env's state layout, the hashed one is capped
+        extra: Dict[str, Any] = {}
+        if agent_backend == "dense":
+            extra["state_dims"] = self.env.state_dims
+        elif agent_backend == "hashed" and max_states is not None:
+            extra["max_states"] = max_states
+        self.agent = AGENT_BACKENDS[agent_backend](alpha=alpha, gamma=gamma, epsilon_decay=epsilon_decay, seed=seed,
+                                                   **extra)
         self.stats = LiveStats(window=30)
+        # Per-phase timers; None or disabled keeps train() free of timing calls
+        self.profiler: Optional[Profiler] = Profiler() if profile else None
+        # Episodes cut by train(max_steps=...) or step_budget
+        self.truncations = 0
+        # Optional experience replay; train() feeds it every transition
+        self.replay = replay
+        # Optional Q(lambda) learning; train() then learns through traces.learn instead of agent.learn
+        self.traces = traces
+        # Periodic checkpointing during train(), e.g. src.checkpoint.AutoSaver
+        self.autosave = None
 
-        self.episodes = []
+        # Kept episodes; with an archive they are memmap-backed views of the file
+        self.archive = EpisodeArchive(archive_path) if archive_path else None
+        self.episodes: List[EpisodeRecord] = []
         self.best_idx = None
-    
+        if self.archive is not None:
+            for i in range(len(self.archive)):
+                self.episodes.append(self._archived_record(i))
+                self._update_best()
+
+    def _archived_record(self, i: int) -> EpisodeRecord:
+        distance, total_reward = self.archive.info(i)
+        return EpisodeRecord(total_reward=total_reward, distance=distance, archive=self.archive, index=i)
+
     def _update_best(self):
+        # Only the newest episode can change the best (max distance, first one wins ties)
         if not self.episodes:
             return
-        # Simple best: max distance
-        best_dist = -1
-        idx = -1
-        for i, ep in enumerate(self.episodes):
-            if ep.distance > best_dist:
-                best_dist = ep.distance
-                idx = i
-        self.best_idx = idx
-
-    def train(self, n_episodes: int = 200, keep_every: int = 50):
+        last = len(self.episodes) - 1
+        if self.best_idx is None or self.episodes[last].distance > self.episodes[self.best_idx].distance:
+            self.best_idx = last
+
+    def _keep_episode(self, traj: Trajectory, total_reward: float, distance: int):
+        if self.archive is not None:
+            i = self.archive.append(traj, distance=distance, total_reward=total_reward)
+            rec = self._archived_record(i)
+        else:
+            rec = EpisodeRecord(total_reward=total_reward, distance=distance, data=traj)
+        self.episodes.append(rec)
+        self._update_best()
+
+    def train(self, n_episodes: int = 200, keep_every: int = 50,
+              callback: Optional[Callable[[int, int], bool]] = None,
+              max_steps: Optional[int] = None, step_budget: Optional[int] = None):
+        """
+        Entrena n_episodes episodios. Si se pasa callback, se llama tras cada
+        episodio con (episodios_hechos, n_episodes); si devuelve False se para.
+        max_steps trunca cada episodio a ese número de pasos y step_budget
+        limita los pasos totales de la llamada (el último episodio se trunca).
+        Un episodio truncado no cuenta como choque y su último paso no es
+        terminal para learn(); se cuentan en self.truncations.
+        Con self.profiler activo se mide el tiempo de cada fase (src.profiling).
+        Si self.replay existe, cada transición pasa también por replay.observe.
+        Si self.traces existe, se aprende con Q(λ) (src.traces) en lugar de agent.learn.
+        """
+        prof = self.profiler if self.profiler is not None and self.profiler.enabled else None
+        clock = time.perf_counter
+        replay = self.replay
+        traces = self.traces
+        learn = self.agent.learn if traces is None else partial(traces.learn, self.agent)
+        steps_left = step_budget
+        if prof is not None:
+            prof.q_table = self.agent.q_table
+            prof.begin()
+
         for ep in range(n_episodes):
+            if steps_left is not None and steps_left <= 0:
+                break
+            limit = max_steps
+            if steps_left is not None:
+                limit = steps_left if limit is None else min(limit, steps_left)
             s = self.env.reset()
+            if traces is not None:
+                traces.reset()
             total = 0.0
-            record_steps = []
+            keep = (ep % keep_every) == 0 or ep == n_episodes - 1
+            recorder = TrajectoryRecorder() if keep else None
             done = False
             crashed = False
 
             while not done:
-                a = self.agent.act(s, training=True)
-                s2, r, done, info = self.env.step(a)
-                self.agent.learn(s, a, r, s2, done)
+                if prof is None:
+                    a = self.agent.act(s, training=True)
+                    s2, r, done, info = self.env.step(a)
+                    learn(s, a, r, s2, done)
+                else:
+                    t0 = clock()
+                    a = self.agent.act(s, training=True)
+                    t1 = clock()
+                    s2, r, done, info = self.env.step(a)
+                    t2 = clock()
+                    learn(s, a, r, s2, done)
+                    t3 = clock()
+                    prof.add("act", t1 - t0)
+                    prof.add("step", t2 - t1)
+                    prof.add("learn", t3 - t2)
+                if replay is not None:
+                    if prof is None:
+                        replay.observe(self.agent, s, a, r, s2, done)
+                    else:
+                        t0 = clock()
+                        replay.observe(self.agent, s, a, r, s2, done)
+                        prof.add("replay", clock() - t0)
                 total += r
                 crashed = info["crashed"]
 
-                record_steps.append({
-                    "car_lane": self.env.car_lane,
-                    "obstacles": [(ob.lane, ob.y) for ob in self.env.obstacles],
-                    "action": a,
-                    "reward": r,
-                    "crashed": crashed,
-                })
+                if recorder is not None:
+                    if prof is None:
+                        recorder.record(self.env, a, r, crashed)
+                    else:
+                        t0 = clock()
+                        recorder.record(self.env, a, r, crashed)
+                        prof.add("record", clock() - t0)
                 s = s2
 
+                # Time limit, not a terminal state: learn() above already bootstrapped from s2
+                if not done and limit is not None and info["distance"] >= limit:
+                    self.truncations += 1
+                    break
+
             self.agent.decay()
 
             # estadística para gráficas (sin mostrar bankroll)
             self.stats.add_episode(distance=info["distance"], total_reward=total, crashed=crashed, epsilon=self.agent.epsilon)
 
-            if (ep % keep_every) == 0 or ep == n_episodes - 1:
-                rec = EpisodeRecord(steps=record_steps, total_reward=total, distance=info["distance"])
-                self.episodes.append(rec)
-                self._update_best()
+            if keep:
+                if prof is None:
+                    self._keep_episode(recorder.finish(), total_reward=total, distance=info["distance"])
+                else:
+                    t0 = clock()
+                    self._keep_episode(recorder.finish(), total_reward=total, distance=info["distance"])
+                    prof.add("update_best", clock() - t0)
+
+            if prof is not None:
+                prof.end_episode(info["distance"])
+
+            if self.autosave is not None:
+                self.autosave.maybe_save(self)
+
+            if steps_left is not None:
+                steps_left -= info["distance"]
+
+            if callback is not None and callback(ep + 1, n_episodes) is False:
+                break
+
+        if prof is not None:
+            prof.end()
+
+    def train_batch(self, n_steps: int = 1000, n_envs: int = 256):
+        """
+        Entrenamiento vectorizado: n_envs entornos en paralelo durante n_steps pasos,
+        con act_batch/learn_batch (requiere el backend "dense").
+        Los episodios terminados se añaden a stats pero no se graban paso a paso.
+        """
+        if not hasattr(self.agent, "act_batch"):
+            raise TypeError("train_batch requires an agent with act_batch/learn_batch (agent_backend='dense')")
+
+        env = VecLaneEnv(n_envs, horizon=self.env.horizon, spawn_prob=self.env.spawn_prob,
+                         seed=self.env.rng.randrange(2**31), n_lanes=self.env.n_lanes, window=self.env.window)
+        s = env.reset()
+        totals = np.zeros(n_envs)
+
+        for _ in range(n_steps):
+            a = self.agent.act_batch(s, training=True)
+            s2, r, done, info = env.step(a)
+            self.agent.learn_batch(s, a, r, info["final_state"], done)
+            totals += r
+
+            for i in np.flatnonzero(done).tolist():
+                self.agent.decay()
+                self.stats.add_episode(distance=int(info["distance"][i]), total_reward=float(totals[i]),
+                                       crashed=bool(info["crashed"][i]), epsilon=self.agent.epsilon)
+            totals[done] = 0.0
+            s = s2
+
+    def train_distributed(self, n_episodes: int = 1000, n_actors: int = 4, **kwargs):
+        """
+        Entrenamiento multiproceso actor/learner con la tabla Q en memoria
+        compartida (ver src.distributed.train_distributed); n_actors=0 es la
+        variante determinista en un solo proceso. Requiere el backend "dense".
+        """
+        from src.distributed import train_distributed
+        return train_distributed(self, n_episodes=n_episodes, n_actors=n_actors, **kwargs)
+
+    def evaluate(self, n_episodes: int = 1000, max_steps: int = 10_000, seed: Optional[int] = None,
+                 workers: int = 0):
+        """
+        Evalúa la política voraz actual en n_episodes entornos nuevos con su
+        propia semilla cada uno (ver src.evaluate.evaluate_policy) y devuelve un
+        EvalReport. Copia la tabla Q: no usa self.env ni los RNG del agente.
+        """
+        from src.evaluate import EVAL_SEED, GreedyPolicy, env_config_of, evaluate_policy
+        policy = GreedyPolicy.from_agent(self.agent, self.env.state_dims)
+        return evaluate_policy(policy, n_episodes=n_episodes, max_steps=max_steps,
+                               seed=EVAL_SEED if seed is None else seed,
+                               env_config=env_config_of(self.env), workers=workers)
+
+
+def main(argv=None):
+    """Entrenamiento sin interfaz (nunca importa pygame): python -m src.train"""
+    parser = argparse.ArgumentParser(description="Headless Q-learning training for LaneEnv")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--horizon", type=int, default=12)
+    parser.add_argument("--spawn-prob", type=float, default=0.35)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--alpha", type=float, default=0.20)
+    parser.add_argument("--gamma", type=float, default=0.95)
+    parser.add_argument("--epsilon-decay", type=float, default=0.990)
+    parser.add_argument("--backend", choices=sorted(AGENT_BACKENDS), default="dict")
+    parser.add_argument("--n-lanes", type=int, default=3)
+    parser.add_argument("--window", type=int, default=None, metavar="K",
+                        help="state only sees lanes within K of the car (keeps the state small with many lanes)")
+    parser.add_argument("--max-states", type=int, default=None,
+                        help="Q-table size cap for --backend hashed (least recently used states are evicted)")
+    parser.add_argument("--keep-every", type=int, default=50)
+    parser.add_argument("--archive", default=None, help="append kept episodes to this episode archive file")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="start from the Q-table of the exact DP solution (src.planning)")
+    parser.add_argument("--resume", default=None, metavar="PATH",
+                        help="continue from this checkpoint (training arguments are taken from it)")
+    parser.add_argument("--checkpoint", default=None, metavar="PATH",
+                        help="save a checkpoint here periodically and at the end")
+    parser.add_argument("--checkpoint-every", type=float, default=60.0, metavar="SECONDS")
+    parser.add_argument("--actors", type=int, default=None, metavar="N",
+                        help="actor/learner training with N actor processes (0 = deterministic single process; needs --backend dense)")
+    parser.add_argument("--learner", choices=("batch", "sequential"), default="batch",
+                        help="how the learner applies actor transitions (with --actors)")
+    parser.add_argument("--replay", type=int, default=0, metavar="CAPACITY",
+                        help="experience replay buffer with this many transitions (0 = off)")
+    parser.add_argument("--replay-ratio", type=float, default=1.0, help="replayed updates per env step")
+    parser.add_argument("--prioritized", action="store_true", help="sample replay by TD error instead of uniformly")
+    parser.add_argument("--trace-lambda", type=float, default=None, metavar="LAMBDA",
+                        help="learn with Watkins Q(lambda) eligibility traces (default: one-step Q-learning)")
+    parser.add_argument("--trace-cutoff", type=float, default=0.01, help="drop traces below this value")
+    parser.add_argument("--max-traces", type=int, default=64, help="most state-action pairs traced at once")
+    budget = parser.add_argument_group("budget (stops before --episodes when reached)")
+    budget.add_argument("--max-steps-per-episode", type=int, default=None, help="truncate longer episodes")
+    budget.add_argument("--step-budget", type=int, default=None, help="total env steps")
+    budget.add_argument("--time-budget", type=float, default=None, metavar="SECONDS")
+    budget.add_argument("--target-avg", type=float, default=None, help="stop once the moving average reaches this")
+    budget.add_argument("--max-crash-rate", type=float, default=None, help="with --target-avg, also require this recent crash rate")
+    budget.add_argument("--patience", type=int, default=None, help="stop after this many episodes without a better moving average")
+    parser.add_argument("--eval", type=int, default=0, metavar="EPISODES",
+                        help="after training, evaluate the greedy policy on this many fresh seeded envs")
+    parser.add_argument("--eval-max-steps", type=int, default=10_000, help="truncate evaluation episodes at this length")
+    parser.add_argument("--eval-workers", type=int, default=0, help="evaluation processes (0 = this process)")
+    parser.add_argument("--profile", action="store_true", help="time each phase of the training loop")
+    parser.add_argument("--profile-out", default=None, help="write the profile as JSON to this file (implies --profile)")
+    args = parser.parse_args(argv)
+
+    if args.resume:
+        from src.checkpoint import load_checkpoint
+        trainer = load_checkpoint(args.resume, archive_path=args.archive)
+    else:
+        trainer = Trainer(horizon=args.horizon, spawn_prob=args.spawn_prob, seed=args.seed,
+                          alpha=args.alpha, gamma=args.gamma, epsilon_decay=args.epsilon_decay,
+                          agent_backend=args.backend, archive_path=args.archive,
+                          n_lanes=args.n_lanes, window=args.window, max_states=args.max_states)
+    if args.profile or args.profile_out is not None:
+        trainer.profiler = Profiler()
+    if args.replay:
+        trainer.replay = ReplayBuffer(args.replay, ratio=args.replay_ratio, prioritized=args.prioritized,
+                                      seed=trainer.seed)
+    if args.trace_lambda is not None:
+        if args.actors is not None:
+            parser.error("--trace-lambda is not supported with --actors")
+        trainer.traces = WatkinsTraces(lam=args.trace_lambda, cutoff=args.trace_cutoff, max_traces=args.max_traces)
+    if args.checkpoint:
+        from src.checkpoint import AutoSaver
+        trainer.autosave = AutoSaver(args.checkpoint, interval=args.checkpoint_every)
+
+    model = solution = None
+    if args.warm_start:
+        if trainer.env.n_lanes != 3 or trainer.env.window is not None:
+            parser.error("--warm-start only supports the classic 3-lane state")
+        from src.planning import build_model, value_iteration, project_q, warm_start
+        # The trainer's settings, which come from the checkpoint with --resume
+        model = build_model(horizon=trainer.env.horizon, spawn_prob=trainer.env.spawn_prob)
+        solution = value_iteration(model, gamma=trainer.agent.gamma)
+        warm_start(trainer.agent, project_q(model, solution))
+
+    # A resumed run starts with the checkpoint's episodes; rates only count this run
+    eps0, steps0 = len(trainer.stats.distances), trainer.stats.distance_sum
+    t0 = time.perf_counter()
+    report = None
+    budgeted = any(v is not None for v in (args.max_steps_per_episode, args.step_budget, args.time_budget,
+                                           args.target_avg, args.patience))
+    if args.actors is not None:
+        trainer.train_distributed(n_episodes=args.episodes, n_actors=args.actors, learner=args.learner)
+    elif budgeted:
+        from src.schedule import TrainingBudget, run_budgeted
+        report = run_budgeted(trainer, TrainingBudget(
+            max_episodes=args.episodes, max_steps_per_episode=args.max_steps_per_episode,
+            max_total_steps=args.step_budget, max_seconds=args.time_budget,
+            target_avg=args.target_avg, max_crash_rate=args.max_crash_rate,
+            patience=args.patience, min_episodes=trainer.stats.ma_window, keep_every=args.keep_every))
+    else:
+        trainer.train(n_episodes=args.episodes, keep_every=args.keep_every)
+    elapsed = max(time.perf_counter() - t0, 1e-9)
+    if trainer.autosave is not None:
+        trainer.autosave.save(trainer, block=True)
+
+    st = trainer.stats
+    episodes = len(st.distances) - eps0
+    steps = st.distance_sum - steps0
+    best = trainer.episodes[trainer.best_idx].distance if trainer.best_idx is not None else 0
+
+    print(f"episodes:        {episodes}" + (f" ({len(st.distances)} total)" if eps0 else ""))
+    print(f"steps:           {steps}")
+    print(f"elapsed:         {elapsed:.2f}s")
+    print(f"episodes/sec:    {episodes / elapsed:.1f}")
+    print(f"steps/sec:       {steps / elapsed:.1f}")
+    if report is not None:
+        print(f"stopped by:      {report.stop_reason} ({report.truncated} truncated episodes)")
+    print(f"moving avg ({st.ma_window}): {st.last_moving_avg():.1f}")
+    print(f"crash rate:      {st.crash_rate_recent() * 100:.1f}% (last {st.window})")
+    print(f"best distance:   {best}")
+    print(f"epsilon:         {trainer.agent.epsilon:.3f}")
+    print(f"q-table states:  {len(trainer.agent.q_table)}")
+    if hasattr(trainer.agent, "evictions"):
+        print(f"evicted states:  {trainer.agent.evictions}")
+    if solution is not None:
+        from src.planning import agent_value
+        print(f"greedy value:    {agent_value(model, trainer.agent, trainer.agent.gamma):.4f} (V* {solution.v[model.start]:.4f})")
+    if args.eval:
+        print(trainer.evaluate(n_episodes=args.eval, max_steps=args.eval_max_steps, workers=args.eval_workers).format())
+    if trainer.profiler is not None:
+        print(format_report(trainer.profiler.snapshot()))
+        if args.profile_out:
+            trainer.profiler.dump(args.profile_out)
+
+if __name__ == "__main__":
+    main()
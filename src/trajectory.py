@@ -0,0 +1,210 @@
+import os
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+@dataclass
+class Trajectory:
+    """
+    Episodio grabado en formato columnar: un array por campo y un buffer
+    empaquetado de obstáculos (ob_offsets[i]:ob_offsets[i+1] son los del paso i).
+    """
+    car_lane: np.ndarray   # int8[n]
+    action: np.ndarray     # int8[n]
+    reward: np.ndarray     # float32[n]
+    crashed: np.ndarray    # bool[n]
+    ob_offsets: np.ndarray # int64[n + 1]
+    ob_lane: np.ndarray    # int8[m]
+    ob_y: np.ndarray       # int16[m]
+
+    def __len__(self) -> int:
+        return len(self.action)
+
+    def obstacles_at(self, i: int) -> List[Tuple[int, int]]:
+        a, b = self.ob_offsets[i], self.ob_offsets[i + 1]
+        return list(zip(self.ob_lane[a:b].tolist(), self.ob_y[a:b].tolist()))
+
+    def step(self, i: int) -> Dict[str, Any]:
+        """Paso i con el formato de diccionario que usaba Trainer.train."""
+        return {
+            "car_lane": int(self.car_lane[i]),
+            "obstacles": self.obstacles_at(i),
+            "action": int(self.action[i]),
+            "reward": float(self.reward[i]),
+            "crashed": bool(self.crashed[i]),
+        }
+
+    def steps(self) -> List[Dict[str, Any]]:
+        return [self.step(i) for i in range(len(self))]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, f).nbytes for f in self.__dataclass_fields__)
+
+
+class TrajectoryRecorder:
+    """Graba pasos en arrays tipados (array.array) y los entrega como Trajectory."""
+
+    def __init__(self):
+        self.car_lane = array("b")
+        self.action = array("b")
+        self.reward = array("f")
+        self.crashed = array("B")
+        self.ob_counts = array("H")
+        self.ob_lane = array("b")
+        self.ob_y = array("h")
+
+    def record(self, env, action: int, reward: float, crashed: bool):
+        self.car_lane.append(env.car_lane)
+        self.action.append(action)
+        self.reward.append(reward)
+        self.crashed.append(1 if crashed else 0)
+        obstacles = env.obstacles
+        self.ob_counts.append(len(obstacles))
+        for ob in obstacles:
+            self.ob_lane.append(ob.lane)
+            self.ob_y.append(ob.y)
+
+    def finish(self) -> Trajectory:
+        return _build_trajectory(
+            np.frombuffer(self.car_lane, dtype=np.int8),
+            np.frombuffer(self.action, dtype=np.int8),
+            np.frombuffer(self.reward, dtype=np.float32),
+            np.frombuffer(self.crashed, dtype=np.uint8),
+            np.frombuffer(self.ob_counts, dtype=np.uint16),
+            np.frombuffer(self.ob_lane, dtype=np.int8),
+            np.frombuffer(self.ob_y, dtype=np.int16),
+        )
+
+def _build_trajectory(car_lane, action, reward, crashed, ob_counts, ob_lane, ob_y) -> Trajectory:
+    offsets = np.zeros(len(ob_counts) + 1, dtype=np.int64)
+    np.cumsum(ob_counts, out=offsets[1:])
+    return Trajectory(car_lane=car_lane, action=action, reward=reward, crashed=crashed.view(np.bool_),
+                      ob_offsets=offsets, ob_lane=ob_lane, ob_y=ob_y)
+
+
+ARCHIVE_MAGIC = b"LANEARC1"
+
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("n_steps", "<u4"),
+    ("n_obs", "<u4"),
+    ("distance", "<i8"),
+    ("total_reward", "<f8"),
+])
+
+class EpisodeArchive:
+    """
+    Archivo de episodios de solo-añadir.
+
+    <path>      : ARCHIVE_MAGIC + un bloque por episodio (alineado a 8 bytes):
+                  reward f32[n] | ob_counts u16[n] | ob_y i16[m] |
+                  car_lane i8[n] | action i8[n] | crashed u8[n] | ob_lane i8[m]
+    <path>.idx  : un registro INDEX_DTYPE por episodio (offset, tamaños, distancia).
+
+    Los episodios se leen con np.memmap, así que buscar el mejor o reproducir
+    uno no carga el resto del archivo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = path + ".idx"
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(ARCHIVE_MAGIC)
+            open(self.index_path, "wb").close()
+        else:
+            with open(path, "rb") as f:
+                if f.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+                    raise ValueError(f"{path} is not an episode archive")
+        self._index = self._read_index()
+        self._data = None
+
+    def _read_index(self) -> np.ndarray:
+        size = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        # Ignore a partially written last record
+        n = size // INDEX_DTYPE.itemsize
+        if n == 0:
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        return np.fromfile(self.index_path, dtype=INDEX_DTYPE, count=n)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def distances(self) -> np.ndarray:
+        return self._index["distance"]
+
+    def append(self, traj: Trajectory, distance: int, total_reward: float) -> int:
+        """Añade un episodio al final del archivo y devuelve su índice."""
+        n, m = len(traj), len(traj.ob_lane)
+        counts = np.diff(traj.ob_offsets).astype("<u2")
+        with open(self.path, "r+b") as f:
+            # Block starts after the last indexed one (drops bytes of an interrupted append)
+            if len(self._index):
+                last = self._index[-1]
+                offset = int(last["offset"]) + _block_size(int(last["n_steps"]), int(last["n_obs"]))
+            else:
+                offset = _align(len(ARCHIVE_MAGIC))
+            f.seek(offset)
+            f.truncate()
+            for arr, dtype in ((traj.reward, "<f4"), (counts, "<u2"), (traj.ob_y, "<i2"),
+                               (traj.car_lane, "i1"), (traj.action, "i1"),
+                               (traj.crashed, "u1"), (traj.ob_lane, "i1")):
+                f.write(np.ascontiguousarray(arr, dtype=dtype).tobytes())
+            f.write(b"\0" * (_block_size(n, m) - _raw_size(n, m)))
+
+        rec = np.array([(offset, n, m, distance, total_reward)], dtype=INDEX_DTYPE)
+        with open(self.index_path, "ab") as f:
+            f.truncate(len(self._index) * INDEX_DTYPE.itemsize)
+            f.write(rec.tobytes())
+        self._index = np.concatenate([self._index, rec])
+        return len(self._index) - 1
+
+    def info(self, i: int) -> Tuple[int, float]:
+        """(distancia, recompensa total) del episodio i, leídos solo del índice."""
+        rec = self._index[i]
+        return int(rec["distance"]), float(rec["total_reward"])
+
+    def _memmap(self, end: int) -> np.memmap:
+        # One mapping per archive, remapped only when `end` lies past it (the file grew).
+        # Trajectories handed out earlier keep viewing the old mapping, which closes with them.
+        if self._data is None or len(self._data) < end:
+            self._data = np.memmap(self.path, dtype=np.uint8, mode="r")
+        return self._data
+
+    def trajectory(self, i: int) -> Trajectory:
+        """Episodio i como vistas sobre el memmap (no copia los datos)."""
+        rec = self._index[i]
+        off, n, m = int(rec["offset"]), int(rec["n_steps"]), int(rec["n_obs"])
+        buf = self._memmap(off + _raw_size(n, m))
+
+        cols = []
+        for count, dtype in ((n, "<f4"), (n, "<u2"), (m, "<i2"),
+                             (n, "i1"), (n, "i1"), (n, "u1"), (m, "i1")):
+            size = count * np.dtype(dtype).itemsize
+            cols.append(buf[off:off + size].view(dtype))
+            off += size
+        reward, counts, ob_y, car_lane, action, crashed, ob_lane = cols
+        return _build_trajectory(car_lane, action, reward, crashed, counts, ob_lane, ob_y)
+
+    def top_k(self, k: int = 1) -> List[int]:
+        """Índices de los k episodios con mayor distancia (mejor primero)."""
+        d = self.distances
+        if len(d) == 0:
+            return []
+        k = min(k, len(d))
+        part = np.argpartition(-d, k - 1)[:k]
+        # Stable on ties: earlier episode first
+        return sorted(part.tolist(), key=lambda i: (-int(d[i]), i))
+
+def _raw_size(n: int, m: int) -> int:
+    return 4 * n + 2 * n + 2 * m + 3 * n + m
+
+def _align(x: int) -> int:
+    return (x + 7) & ~7
+
+def _block_size(n: int, m: int) -> int:
+    return _align(_raw_size(n, m))
@@ -0,0 +1,149 @@
+import random
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from src.env import LaneEnv, Obstacle, WALL_BIN
+
+class VecLaneEnv:
+    """
+    N instancias de LaneEnv avanzando en paralelo con arrays de NumPy.
+
+    Cada sub-entorno i usa su propio random.Random(seeds[i]) con el mismo orden
+    de llamadas que LaneEnv, así que las trayectorias coinciden paso a paso con
+    LaneEnv(seed=seeds[i]). Los sub-entornos que terminan se reinician solos.
+    """
+
+    def __init__(self, n_envs: int, horizon: int = 12, spawn_prob: float = 0.35,
+                 seed: int = 7, seeds: Optional[Sequence[int]] = None,
+                 n_lanes: int = 3, window: Optional[int] = None):
+        if seeds is None:
+            seeds = [seed + i for i in range(n_envs)]
+        if len(seeds) != n_envs:
+            raise ValueError(f"expected {n_envs} seeds, got {len(seeds)}")
+
+        self.n_envs = n_envs
+        self.horizon = horizon
+        self.spawn_prob = spawn_prob
+        self.n_lanes = n_lanes
+        self.window = window
+        self.start_lane = n_lanes // 2
+        self.min_gap = LaneEnv(horizon=horizon).min_gap
+        self.rngs = [random.Random(s) for s in seeds]
+
+        # An obstacle lives horizon+1 steps and spawns are at least min_gap apart
+        self.max_obstacles = (horizon + 1) // self.min_gap + 1
+
+        # Obstacle slots: y == -1 marks an empty slot
+        self.ob_lane = np.zeros((n_envs, self.max_obstacles), dtype=np.int16)
+        self.ob_y = np.full((n_envs, self.max_obstacles), -1, dtype=np.int16)
+
+        self.car_lane = np.full(n_envs, self.start_lane, dtype=np.int16)
+        self.step_count = np.zeros(n_envs, dtype=np.int64)
+
+        # Same bins as LaneEnv._bin_dist, indexed by distance 0..horizon
+        ref = LaneEnv(horizon=horizon)
+        self._bins = np.array([ref._bin_dist(d) for d in range(horizon + 1)], dtype=np.intp)
+        self._lanes = np.arange(n_lanes, dtype=np.int16)
+        if window is not None:
+            # Lane offsets seen by the window, relative to the car
+            self._offsets = np.arange(-window, window + 1, dtype=np.intp)
+
+    def reset(self):
+        self.car_lane[:] = self.start_lane
+        self.ob_y[:] = -1
+        self.step_count[:] = 0
+        return self.states()
+
+    def states(self, rows=None):
+        """Estados (n, len(state)) con el mismo formato que LaneEnv.state()."""
+        if rows is None:
+            rows = slice(None)
+        ys = self.ob_y[rows]
+        lanes = self.ob_lane[rows]
+        # (n, n_lanes, K): obstacle k of env n counts for lane l
+        in_lane = (lanes[:, None, :] == self._lanes[None, :, None]) & (ys[:, None, :] >= 0)
+        bins = self._bins[np.where(in_lane, ys[:, None, :], self.horizon).min(axis=2)]
+        car = self.car_lane[rows]
+
+        if self.window is not None:
+            seen = car[:, None] + self._offsets[None, :]
+            off_road = (seen < 0) | (seen >= self.n_lanes)
+            out = np.take_along_axis(bins, np.clip(seen, 0, self.n_lanes - 1), axis=1)
+            out[off_road] = WALL_BIN
+            return out
+
+        out = np.empty((bins.shape[0], self.n_lanes + 1), dtype=np.intp)
+        out[:, 0] = car
+        out[:, 1:] = bins
+        return out
+
+    def step(self, actions):
+        """
+        Avanza todos los sub-entornos un paso.
+        Devuelve (states, rewards, dones, infos); infos contiene arrays
+        "crashed", "distance" y "final_state" (estado previo al auto-reset).
+        """
+        actions = np.asarray(actions)
+        # 0=Left, 1=Stay, 2=Right
+        self.car_lane = np.clip(self.car_lane + (actions - 1), 0, self.n_lanes - 1).astype(np.int16)
+
+        # Move obstacles; the ones that go below 0 become empty slots
+        np.maximum(self.ob_y - 1, -1, out=self.ob_y)
+
+        crashed = ((self.ob_y == 0) & (self.ob_lane == self.car_lane[:, None])).any(axis=1)
+
+        # Spawning draws from each env's own RNG, in the same order as LaneEnv
+        # Only live slots count: with horizon - min_gap < -1 an empty slot (y == -1) would block every spawn
+        too_close = ((self.ob_y >= 0) & (self.ob_y > self.horizon - self.min_gap)).any(axis=1)
+        spawn_rows = []
+        spawn_lanes = []
+        rngs = self.rngs
+        spawn_prob = self.spawn_prob
+        n_lanes = self.n_lanes
+        for i in np.flatnonzero(~too_close).tolist():
+            rng = rngs[i]
+            if rng.random() < spawn_prob:
+                spawn_rows.append(i)
+                # randrange(n) draws exactly like LaneEnv's randint(0, n - 1), one call level less
+                spawn_lanes.append(rng.randrange(n_lanes))
+        if spawn_rows:
+            slots = np.argmin(self.ob_y[spawn_rows], axis=1)
+            self.ob_lane[spawn_rows, slots] = spawn_lanes
+            self.ob_y[spawn_rows, slots] = self.horizon
+
+        self.step_count += 1
+
+        rewards = np.where(crashed, -10.0, 1.0)
+        dones = crashed
+        states = self.states()
+        infos = {
+            "crashed": crashed,
+            "distance": self.step_count.copy(),
+            "final_state": states.copy(),
+        }
+
+        done_idx = np.flatnonzero(dones)
+        if done_idx.size:
+            self.car_lane[done_idx] = self.start_lane
+            self.ob_y[done_idx] = -1
+            self.step_count[done_idx] = 0
+            states[done_idx] = self.states(done_idx)
+
+        return states, rewards, dones, infos
+
+    def keep(self, rows):
+        """Se queda solo con los sub-entornos de rows (en ese orden), con su estado y su RNG."""
+        rows = np.asarray(rows, dtype=np.intp)
+        self.ob_lane = self.ob_lane[rows]
+        self.ob_y = self.ob_y[rows]
+        self.car_lane = self.car_lane[rows]
+        self.step_count = self.step_count[rows]
+        self.rngs = [self.rngs[i] for i in rows.tolist()]
+        self.n_envs = len(rows)
+
+    def obstacles(self, i: int) -> List[Obstacle]:
+        """Obstáculos del sub-entorno i, en el mismo orden que LaneEnv.obstacles."""
+        slots = np.flatnonzero(self.ob_y[i] >= 0)
+        slots = slots[np.argsort(self.ob_y[i, slots], kind="stable")]
+        return [Obstacle(lane=int(self.ob_lane[i, k]), y=int(self.ob_y[i, k])) for k in slots]
@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.train import Trainer
+from src.profiling import Profiler
+
+@dataclass(frozen=True)
+class AgentSnapshot:
+    """Copia inmutable del agente publicada por el worker (versión creciente)."""
+    version: int
+    agent: Any
+    epsilon: float
+    episodes: int
+
+@dataclass(frozen=True)
+class TrainingProgress:
+    running: bool
+    done: int            # episodes of the current request finished
+    total: int           # episodes requested (current + queued)
+    episodes_per_sec: float
+    steps_per_sec: float
+
+# (distance, total_reward, crashed, epsilon): same arguments as LiveStats.add_episode
+EpisodeDelta = Tuple[int, float, bool, float]
+
+class TrainingWorker:
+    """
+    Ejecuta Trainer.train en un hilo en segundo plano.
+
+    El hilo es el único que toca trainer (env, agente y stats). Cada
+    publish_interval segundos publica una copia del agente (AgentSnapshot) y
+    los episodios nuevos; la UI solo lee latest() y drain_episodes(), así que
+    nunca ve el agente a medio actualizar ni bloquea el bucle de render.
+
+    La copia (agent.play_copy) solo lleva las filas Q visitadas. Con tablas
+    grandes el intervalo se alarga para que copiar no ocupe más de
+    PUBLISH_COPY_SHARE del tiempo del hilo (y del GIL).
+    """
+
+    # Most of the worker's time that copying the agent may take
+    PUBLISH_COPY_SHARE = 0.1
+
+    def __init__(self, trainer: Trainer, publish_interval: float = 0.1,
+                 max_episode_steps: Optional[int] = 10_000):
+        self.trainer = trainer
+        self.publish_interval = publish_interval
+        # Bounds how long one 'T' episode (and its recording) can run once the policy is good
+        self.max_episode_steps = max_episode_steps
+
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._pending = 0
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._deltas: deque = deque()
+        self._published_eps = len(trainer.stats.distances)
+        self._snapshot = self._make_snapshot(version=0)
+
+        self._running = False
+        self._done = 0
+        self._total = 0
+        self._rate = (0.0, 0.0)
+        self._last_publish = 0.0
+        self._next_interval = publish_interval
+        self._perf: Optional[Dict[str, Any]] = None
+
+    def _make_snapshot(self, version: int) -> AgentSnapshot:
+        t0 = time.perf_counter()
+        agent = self.trainer.agent.play_copy()
+        # Publish less often when the copy is slow, so it stays a small share of the worker's time
+        self._next_interval = max(self.publish_interval, (time.perf_counter() - t0) / self.PUBLISH_COPY_SHARE)
+        return AgentSnapshot(version=version, agent=agent, epsilon=agent.epsilon,
+                             episodes=len(self.trainer.stats.distances))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="training-worker", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        with self._lock:
+            self._stop = True
+            self._wake.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def request(self, n_episodes: int):
+        """Encola n_episodes más de entrenamiento."""
+        with self._lock:
+            self._pending += n_episodes
+            self._total += n_episodes
+            self._wake.notify()
+
+    def latest(self) -> AgentSnapshot:
+        return self._snapshot
+
+    def drain_episodes(self) -> List[EpisodeDelta]:
+        """Episodios terminados desde la última llamada."""
+        out = []
+        while self._deltas:
+            out.append(self._deltas.popleft())
+        return out
+
+    def progress(self) -> TrainingProgress:
+        with self._lock:
+            eps_rate, step_rate = self._rate
+            return TrainingProgress(running=self._running, done=self._done, total=self._total,
+                                    episodes_per_sec=eps_rate, steps_per_sec=step_rate)
+
+    def set_profiling(self, enabled: bool):
+        """Activa o desactiva trainer.profiler; se aplica a partir del siguiente lote."""
+        with self._lock:
+            if self.trainer.profiler is None:
+                self.trainer.profiler = Profiler(enabled=enabled)
+            else:
+                self.trainer.profiler.enabled = enabled
+
+    def perf(self) -> Optional[Dict[str, Any]]:
+        """Último Profiler.snapshot() publicado (None si no se ha perfilado nada)."""
+        return self._perf
+
+    def _publish(self):
+        st = self.trainer.stats
+        n = len(st.distances)
+        for i in range(self._published_eps, n):
+            self._deltas.append((st.distances[i], st.rewards[i], bool(st.crashes[i]), st.epsilons[i]))
+        self._published_eps = n
+        prof = self.trainer.profiler
+        if prof is not None and prof.episodes:
+            self._perf = prof.snapshot()
+        # Swapping the reference is atomic; readers keep whatever snapshot they already hold
+        self._snapshot = self._make_snapshot(self._snapshot.version + 1)
+        self._last_publish = time.perf_counter()
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                while self._pending == 0 and not self._stop:
+                    self._wake.wait()
+                if self._stop:
+                    return
+                n = self._pending
+                self._pending = 0
+                self._running = True
+
+            st = self.trainer.stats
+            eps0, steps0 = len(st.distances), st.distance_sum
+            t0 = time.perf_counter()
+
+            def on_episode(ep: int, n_total: int):
+                now = time.perf_counter()
+                with self._lock:
+                    if self._stop:
+                        return False
+                    self._done += 1
+                    elapsed = max(now - t0, 1e-9)
+                    eps = len(st.distances) - eps0
+                    steps = st.distance_sum - steps0
+                    self._rate = (eps / elapsed, steps / elapsed)
+                if now - self._last_publish >= self._next_interval:
+                    self._publish()
+                return True
+
+            self.trainer.train(n_episodes=n, callback=on_episode, max_steps=self.max_episode_steps)
+            self._publish()
+
+            with self._lock:
+                self._running = self._pending > 0
+                if not self._running:
+                    self._done = 0
+                    self._total = 0